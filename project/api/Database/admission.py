@@ -0,0 +1,104 @@
+"""
+Admission control for write requests.
+
+Reads (GET, HEAD, OPTIONS) always pass. Writes are limited before their body is read:
+
+    WRITE_CONCURRENCY_LIMIT      writes handled at once (default 16)
+    WRITE_QUEUE_LIMIT            further writes allowed to wait for a slot (default 32)
+    WRITE_QUEUE_TIMEOUT          seconds a write may wait before it is shed (default 0.5)
+    BULK_CONCURRENCY_LIMIT       `/bulk` writes handled at once; these never wait (default 2)
+    READ_RESERVED_CONNECTIONS    pool connections writes may not take, kept for reads (default 2)
+    ADMISSION_RETRY_AFTER        seconds suggested to shed clients (default 1)
+
+Shed requests get 503 with a `Retry-After` header straight away, instead of queueing for
+a pool connection until they time out and slowing every read behind them.
+"""
+
+import asyncio
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy.pool import Pool
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that sheds write requests once write slots or pool connections run out.
+
+    Args:
+        app: The wrapped ASGI application.
+        pool (Optional[Pool]): Connection pool whose free capacity is checked before admitting a write.
+        pool_capacity (int): Most connections the pool may open (pool size plus overflow).
+        exempt_paths (Tuple[str, ...]): Paths admitted without limits, for writes that do not hold a connection.
+    """
+
+    def __init__(self, app, pool: Optional[Pool] = None, pool_capacity: int = 0, exempt_paths: Tuple[str, ...] = ()) -> None:
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+        self.pool = pool
+        self.pool_capacity = pool_capacity
+        self.write_slots = asyncio.Semaphore(int(os.environ.get("WRITE_CONCURRENCY_LIMIT", "16")))
+        self.bulk_slots = int(os.environ.get("BULK_CONCURRENCY_LIMIT", "2"))
+        self.queue_limit = int(os.environ.get("WRITE_QUEUE_LIMIT", "32"))
+        self.queue_timeout = float(os.environ.get("WRITE_QUEUE_TIMEOUT", "0.5"))
+        self.read_reserve = int(os.environ.get("READ_RESERVED_CONNECTIONS", "2"))
+        self.retry_after = os.environ.get("ADMISSION_RETRY_AFTER", "1")
+        self.bulk_in_flight = 0
+        self.waiting = 0
+
+    def _pool_saturated(self) -> bool:
+        if self.pool is None or self.pool_capacity <= 0:
+            return False
+        return self.pool.checkedout() >= self.pool_capacity - self.read_reserve
+
+    async def _reject(self, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Server is busy, retry later"}'})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self._pool_saturated():
+            await self._reject(send)
+            return
+
+        if scope["path"].rstrip("/").endswith("/bulk"):
+            if self.bulk_in_flight >= self.bulk_slots:
+                await self._reject(send)
+                return
+            self.bulk_in_flight += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.bulk_in_flight -= 1
+            return
+
+        if self.write_slots.locked():
+            if self.waiting >= self.queue_limit:
+                await self._reject(send)
+                return
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.write_slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                await self._reject(send)
+                return
+            finally:
+                self.waiting -= 1
+        else:
+            await self.write_slots.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.write_slots.release()
@@ -0,0 +1,158 @@
+"""
+Deterministic variant assignment served from an in-memory snapshot.
+
+The variants of a test are the landing pages of its product, plus its own landing page,
+grouped by `variant_type`. A customer is assigned by hashing "<test_id>:<customer_id>" into
+one of the test's variant types, so the same customer always sees the same variant of a
+test and assignments of different tests are independent. Each variant type is served by
+the test's own landing page if it has that type, otherwise by its lowest landing page ID.
+
+Assignments never touch the database. The snapshot is loaded at startup and refreshed by
+the A/B test write endpoints; `refresh` with no test reloads everything, for writes that
+can affect many tests (such as deleting a product). A background task also reloads it every
+`ASSIGNMENT_REFRESH_SECONDS`, which bounds staleness from writes made outside the API (for
+example the ETL). A failed load is logged and retried on the next interval, so the API
+starts even before the tables exist.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import SessionLocal
+from .models import ABTestingDB, LandingPageDB
+
+logger = logging.getLogger(__name__)
+
+# One variant of a test: (variant_type, landing_page_id, page_url)
+Variant = Tuple[str, int, str]
+
+
+def bucket(test_id: int, customer_id: int, buckets: int) -> int:
+    """
+    Map a customer to one of `buckets` variants of a test, uniformly and deterministically.
+    """
+    digest = hashlib.blake2b(f"{test_id}:{customer_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % buckets
+
+
+class AssignmentSnapshot:
+    """
+    In-memory map from test ID to its variants, ordered by variant type.
+
+    Args:
+        refresh_interval (float): Seconds between full reloads by the background task.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self.tests: Dict[int, Tuple[Variant, ...]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def refresh(self, db: AsyncSession, test_id: Optional[int] = None) -> None:
+        """
+        Reload the variants of one test, or of every test when `test_id` is None.
+
+        Args:
+            db (AsyncSession): Database session.
+            test_id (Optional[int]): The test to reload; a test that no longer exists is dropped.
+        """
+        # One equi-join per way a landing page belongs to a test, so each side can use an
+        # index; an OR in the join condition forces a nested loop over tests x pages
+        branches = []
+        for condition in (
+            LandingPageDB.landing_page_id == ABTestingDB.landing_page_id,
+            LandingPageDB.product_id == ABTestingDB.product_id,
+        ):
+            branch = select(
+                ABTestingDB.test_id, ABTestingDB.landing_page_id.label("own_page_id"),
+                LandingPageDB.variant_type, LandingPageDB.landing_page_id.label("page_id"),
+                LandingPageDB.page_url,
+            ).join(LandingPageDB, condition)
+            if test_id is not None:
+                branch = branch.filter(ABTestingDB.test_id == test_id)
+            branches.append(branch)
+        query = union(*branches)
+        columns = query.selected_columns
+        query = query.order_by(columns.test_id, columns.variant_type, columns.page_id)
+
+        tests: Dict[int, Dict[str, Variant]] = {}
+        for row_test_id, own_page_id, variant_type, page_id, page_url in (await db.execute(query)).all():
+            variants = tests.setdefault(row_test_id, {})
+            if variant_type not in variants or page_id == own_page_id:
+                variants[variant_type] = (variant_type, page_id, page_url)
+
+        snapshot = {key: tuple(variants.values()) for key, variants in tests.items()}
+        if test_id is None:
+            self.tests = snapshot
+        elif test_id in snapshot:
+            self.tests[test_id] = snapshot[test_id]
+        else:
+            self.tests.pop(test_id, None)
+
+    async def load(self) -> bool:
+        """
+        Reload every test in a session of its own, logging instead of raising on failure.
+
+        Returns:
+            bool: True if the snapshot was reloaded.
+        """
+        try:
+            async with SessionLocal() as db:
+                await self.refresh(db)
+            return True
+        except Exception:
+            logger.exception("Loading the assignment snapshot failed; retrying in %s s", self.refresh_interval)
+            return False
+
+    async def run(self) -> None:
+        """
+        Reload the snapshot every `refresh_interval` seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.load()
+
+    def start(self) -> None:
+        """
+        Start the periodic reload on the running event loop.
+        """
+        if self.task is None and self.refresh_interval > 0:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop the periodic reload.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def discard(self, test_id: int) -> None:
+        """
+        Forget a deleted test.
+        """
+        self.tests.pop(test_id, None)
+
+    def assign(self, test_id: int, customer_id: int) -> Optional[Variant]:
+        """
+        Return the variant shown to a customer, or None if the test is unknown.
+        """
+        variants = self.tests.get(test_id)
+        if not variants:
+            return None
+        return variants[bucket(test_id, customer_id, len(variants))]
+
+
+assignment_snapshot = AssignmentSnapshot(
+    refresh_interval=float(os.environ.get("ASSIGNMENT_REFRESH_SECONDS", "30")),
+)
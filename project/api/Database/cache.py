@@ -0,0 +1,141 @@
+"""
+In-process read-through cache for GET responses.
+
+Entries live in LRU ordered dictionaries keyed by (namespace, key) and expire after a fixed
+TTL. List pages (up to `MAX_PAGE_SIZE` rows each) are kept apart from single records, with
+their own limit, so walking deep through a listing cannot evict the hot records. Write
+handlers invalidate exactly the namespaces and keys they affect; the TTL only bounds
+staleness from writes made outside the API (for example the ETL). Each worker process keeps
+its own cache.
+
+A read that misses must take `generation(namespace)` before querying and pass it to `set`.
+Every invalidation bumps the namespace's generation, so a value read before a concurrent
+write committed is not stored after that write's invalidation.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Sentinel returned by `ResponseCache.get` on a miss, since None is a valid cached value.
+MISSING = object()
+
+# Namespaces holding list pages rather than single records
+PAGE_NAMESPACES = frozenset({"customers", "products", "abtests", "results"})
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with per-entry TTL, per-namespace generations and hit/miss counters.
+
+    Args:
+        max_entries (int): Maximum number of single records before the least recently used is evicted.
+        ttl (float): Seconds an entry stays valid after it is stored.
+        max_pages (int): Maximum number of list pages, kept in a separate LRU.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_pages: int = 256) -> None:
+        self.max_entries = max_entries
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self.pages: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self.generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+
+    def _store(self, namespace: str) -> Tuple["OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]", int]:
+        if namespace in PAGE_NAMESPACES:
+            return self.pages, self.max_pages
+        return self.entries, self.max_entries
+
+    def generation(self, namespace: str) -> int:
+        """
+        Return the namespace's current generation, to be passed to `set` after the read.
+        """
+        return self.generations.get(namespace, 0)
+
+    def get(self, namespace: str, key: Hashable) -> Any:
+        """
+        Look up an entry and mark it as recently used.
+
+        Returns:
+            Any: The cached value, or `MISSING` if absent or expired.
+        """
+        entries, _ = self._store(namespace)
+        entry = entries.get((namespace, key))
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del entries[(namespace, key)]
+            self.misses += 1
+            return MISSING
+        entries.move_to_end((namespace, key))
+        self.hits += 1
+        return entry[1]
+
+    def set(self, namespace: str, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store an entry, evicting the least recently used one if its LRU is full.
+
+        Args:
+            namespace (str): The entry's namespace.
+            key (Hashable): The entry's key within the namespace.
+            value (Any): The value to cache.
+            generation (int): `generation(namespace)` taken before the value was read; the
+                value is dropped if the namespace was invalidated since.
+        """
+        if generation != self.generation(namespace):
+            self.stale_fills += 1
+            return
+        entries, limit = self._store(namespace)
+        if limit <= 0:
+            return
+        entries[(namespace, key)] = (time.monotonic() + self.ttl, value)
+        entries.move_to_end((namespace, key))
+        while len(entries) > limit:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        """
+        Drop one entry, or every entry of a namespace when no key is given.
+        """
+        self.generations[namespace] = self.generation(namespace) + 1
+        entries, _ = self._store(namespace)
+        if key is not None:
+            stale = [(namespace, key)] if (namespace, key) in entries else []
+        else:
+            stale = [entry_key for entry_key in entries if entry_key[0] == namespace]
+        for entry_key in stale:
+            del entries[entry_key]
+        self.invalidations += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report counters for sizing the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "pages": len(self.pages),
+            "max_pages": self.max_pages,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_fills": self.stale_fills,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "4096")),
+    ttl=float(os.environ.get("CACHE_TTL_SECONDS", "30")),
+    max_pages=int(os.environ.get("CACHE_MAX_PAGES", "256")),
+)
@@ -1,18 +1,42 @@
 import sqlalchemy as sql
+import sqlalchemy.dialects.postgresql as postgresql
+import sqlalchemy.dialects.sqlite as sqlite
+import sqlalchemy.ext.asyncio as asyncio
 import sqlalchemy.ext.declarative as declarative
-import sqlalchemy.orm as orm
 from dotenv import load_dotenv
 import os
+from .pool import TimedQueuePool, pool_options
+from .querylog import instrument
 load_dotenv(".env")
 
+# Async drivers used in place of the sync driver named in DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def to_async_url(database_url: str) -> sql.engine.URL:
+    url = sql.engine.make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+# Dialect-specific INSERT constructs that support ON CONFLICT upserts
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 DATABASE_URL = os.environ.get("DATABASE_URL")
-engine = sql.create_engine(DATABASE_URL)
+POOL_OPTIONS = pool_options()
+engine = asyncio.create_async_engine(to_async_url(DATABASE_URL), poolclass=TimedQueuePool, **POOL_OPTIONS)
+instrument(engine.sync_engine)
 Base = declarative.declarative_base()
-SessionLocal = orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if engine.dialect.name == "sqlite":
+    # SQLite only enforces foreign keys (and so ON DELETE CASCADE) when asked to
+    @sql.event.listens_for(engine.sync_engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+SessionLocal = asyncio.async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,115 @@
+"""
+Strong ETags and conditional GET handling.
+
+The ETag is a hash of the serialized response body. It is computed once when a response
+is built and stored next to it in the response cache, so a matching `If-None-Match`
+is answered with 304 without serializing anything.
+
+Large list endpoints skip response models altogether: `tag_json` serializes plain dicts
+with orjson once, and `conditional_json` returns those bytes as they are.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional, Tuple, Union
+
+import orjson
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Compute a strong ETag for a response body.
+
+    Args:
+        body (bytes): The serialized response body.
+
+    Returns:
+        str: The quoted ETag value.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def tag(model: BaseModel) -> Tuple[BaseModel, str]:
+    """
+    Pair a response model with the ETag of its JSON serialization.
+
+    Args:
+        model (BaseModel): The response model.
+
+    Returns:
+        tuple: The model and its ETag.
+    """
+    return model, compute_etag(model.model_dump_json().encode())
+
+
+def tag_json(content: Any) -> Tuple[bytes, str]:
+    """
+    Serialize plain JSON data with orjson and pair the body with its ETag.
+
+    Args:
+        content (Any): Dicts, lists and scalars shaped like the endpoint's response model.
+
+    Returns:
+        tuple: The JSON body and its ETag.
+    """
+    body = orjson.dumps(content)
+    return body, compute_etag(body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an `If-None-Match` header against an ETag (weak comparison, RFC 9110).
+
+    Args:
+        if_none_match (Optional[str]): The request header value, if any.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def conditional(entry: Tuple[BaseModel, str], if_none_match: Optional[str], response: Response) -> Union[BaseModel, Response]:
+    """
+    Answer a GET with 304 Not Modified or with the body and its ETag.
+
+    Args:
+        entry (tuple): The response model and its ETag, as built by `tag`.
+        if_none_match (Optional[str]): The request's `If-None-Match` header.
+        response (Response): The handler's response, used to set the ETag header.
+
+    Returns:
+        BaseModel | Response: An empty 304 response, or the model to serialize.
+    """
+    model, etag = entry
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return model
+
+
+def conditional_json(entry: Tuple[bytes, str], if_none_match: Optional[str], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Like `conditional`, for a pre-serialized JSON body built by `tag_json`.
+
+    Args:
+        entry (tuple): The JSON body and its ETag.
+        if_none_match (Optional[str]): The request's `If-None-Match` header.
+        headers (Optional[dict]): Extra headers for both responses, such as `Vary`.
+
+    Returns:
+        Response: An empty 304 response, or the body with its ETag.
+    """
+    body, etag = entry
+    headers = {**(headers or {}), "ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,187 @@
+"""
+Write-behind buffer for raw events.
+
+`POST /events` only appends to an in-memory buffer; a background task writes the buffer to
+the `events` table with multi-row INSERTs whenever it holds `EVENT_BATCH_SIZE` events or
+`EVENT_FLUSH_INTERVAL_MS` has passed since the last flush. The buffer holds at most
+`EVENT_BUFFER_SIZE` events, counting those a flush is still writing. When it is full,
+ingest waits up to `EVENT_ENQUEUE_TIMEOUT` seconds for a flush to make room. After that the
+request is rejected, and the client is expected to back off.
+
+A batch that fails on a constraint (for example an unknown customer) is split in halves and
+retried, so only the offending events are dropped and counted. Events still buffered when
+the process stops are flushed on shutdown, but buffered events are lost if it crashes.
+Batches that fail for any other reason (the database being unreachable) stay buffered and
+are retried, so a long outage fills the buffer and turns into backpressure.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from .database import SessionLocal
+from .models import EventDB
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """
+    Bounded in-memory event buffer with a batching background flusher.
+
+    Args:
+        max_size (int): Most events held in memory before ingest applies backpressure.
+        batch_size (int): Buffered events that trigger a flush, and rows per INSERT.
+        flush_interval (float): Seconds after which a partial batch is flushed anyway.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events: List[Dict[str, Any]] = []
+        # Events taken out of the buffer by a flush that are not written yet
+        self.pending = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+
+    async def put(self, events: List[Dict[str, Any]], timeout: float) -> bool:
+        """
+        Append events to the buffer, waiting up to `timeout` seconds for room.
+
+        Args:
+            events (List[dict]): Rows for the events table.
+            timeout (float): Seconds to wait for a flush when the buffer is full.
+
+        Returns:
+            bool: True if the events were buffered, False if the buffer stayed full.
+        """
+        if len(events) > self.max_size:
+            self.rejected += len(events)
+            return False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while len(self.events) + self.pending + len(events) > self.max_size:
+            self._drained.clear()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._drained.wait(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                self.rejected += len(events)
+                return False
+        self.events.extend(events)
+        if len(self.events) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> None:
+        """
+        Write every buffered event to the database in batches of `batch_size`.
+        """
+        while self.events:
+            events, self.events = self.events, []
+            self.pending = len(events)
+            written = 0
+            try:
+                async with SessionLocal() as db:
+                    for start in range(0, len(events), self.batch_size):
+                        batch = events[start:start + self.batch_size]
+                        await self._insert(db, batch)
+                        written += len(batch)
+                        self.pending -= len(batch)
+                        self._drained.set()
+            except Exception:
+                # Keep what was not written (e.g. the database is down) for the next flush.
+                # `put` counts pending events, so this stays within max_size; trim anyway.
+                unwritten = events[written:]
+                room = max(self.max_size - len(self.events), 0)
+                if len(unwritten) > room:
+                    self.dropped += len(unwritten) - room
+                    logger.warning("Dropping %d unwritten events over the buffer limit", len(unwritten) - room)
+                    unwritten = unwritten[:room]
+                self.events[:0] = unwritten
+                raise
+            finally:
+                self.pending = 0
+
+    async def _insert(self, db, events: List[Dict[str, Any]]) -> None:
+        try:
+            await db.execute(insert(EventDB), events)
+            await db.commit()
+            self.flushed += len(events)
+        except IntegrityError:
+            await db.rollback()
+            if len(events) == 1:
+                self.dropped += 1
+                logger.warning("Dropping event that violates a constraint: %s", events[0])
+                return
+            middle = len(events) // 2
+            await self._insert(db, events[:middle])
+            await self._insert(db, events[middle:])
+
+    async def run(self) -> None:
+        """
+        Flush whenever a batch is full or the flush interval has passed, until `stop` is called.
+        """
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Event flush failed; retrying")
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        """
+        Start the background flusher on the running event loop.
+        """
+        if self.task is None:
+            self._stopping = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background flusher once its current flush is done, then write out what is
+        still buffered.
+        """
+        if self.task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report buffer occupancy and how many events were flushed, dropped or rejected.
+        """
+        return {
+            "buffered": len(self.events) + self.pending,
+            "max_size": self.max_size,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+
+event_buffer = EventBuffer(
+    max_size=int(os.environ.get("EVENT_BUFFER_SIZE", "200000")),
+    batch_size=int(os.environ.get("EVENT_BATCH_SIZE", "5000")),
+    flush_interval=float(os.environ.get("EVENT_FLUSH_INTERVAL_MS", "200")) / 1000,
+)
+
+# Seconds an ingest request may wait for room in a full buffer
+EVENT_ENQUEUE_TIMEOUT = float(os.environ.get("EVENT_ENQUEUE_TIMEOUT", "1"))
@@ -0,0 +1,71 @@
+"""
+Eager loading of A/B test relations requested with `?expand=`.
+
+Many-to-one relations are loaded with `joinedload` in the same query as the tests, and the
+results collection with `selectinload` in one extra `WHERE test_id IN (...)` query, so an
+expanded page costs at most two queries however many tests it holds. Relations are never
+loaded lazily, which the async session would not allow anyway.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import joinedload, selectinload
+
+from .models import ABTestingDB
+from .schemas import ABTest, ABTestExpanded
+
+# Expandable relation name -> loader option
+AB_TEST_EXPANSIONS = {
+    "product": joinedload(ABTestingDB.product),
+    "landing_page": joinedload(ABTestingDB.landing_page),
+    "results": selectinload(ABTestingDB.results),
+}
+
+
+def parse_expand(expand: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated `expand` query parameter.
+
+    Args:
+        expand (Optional[str]): Relation names such as "product,results", or None.
+
+    Returns:
+        tuple: The distinct relation names in sorted order; empty when nothing is expanded.
+
+    Raises:
+        HTTPException: If a name is not one of `AB_TEST_EXPANSIONS`.
+    """
+    if not expand:
+        return ()
+    names = sorted({name.strip() for name in expand.split(",") if name.strip()})
+    unknown = [name for name in names if name not in AB_TEST_EXPANSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand {', '.join(unknown)}; choose from {', '.join(AB_TEST_EXPANSIONS)}",
+        )
+    return tuple(names)
+
+
+def expand_options(expansions: Tuple[str, ...]) -> List[Any]:
+    """
+    Return the loader options for the requested relations, to pass to `Select.options`.
+    """
+    return [AB_TEST_EXPANSIONS[name] for name in expansions]
+
+
+def expanded_ab_test(ab_test: ABTestingDB, expansions: Tuple[str, ...]) -> ABTestExpanded:
+    """
+    Build the response model of an eagerly loaded test, setting only the requested relations.
+
+    Args:
+        ab_test (ABTestingDB): Test loaded with `expand_options(expansions)`.
+        expansions (tuple): Relation names from `parse_expand`.
+
+    Returns:
+        ABTestExpanded: The test with its requested relations.
+    """
+    fields: Dict[str, Any] = {name: getattr(ab_test, name) for name in ABTest.model_fields}
+    fields.update((name, getattr(ab_test, name)) for name in expansions)
+    return ABTestExpanded.model_validate(fields, from_attributes=True)
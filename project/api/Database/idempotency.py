@@ -0,0 +1,116 @@
+"""
+Idempotency keys for create endpoints.
+
+A client that sends `Idempotency-Key: <key>` with a create request can retry it safely: the
+first successful response is stored under the key, and later requests with the same key
+and body get that response back instead of inserting again. Reusing a key with a different
+body is rejected with 422. A retry that arrives while the original is still running waits
+for it rather than racing it. Failed requests are not stored, so they can be retried.
+
+Keys live in a bounded LRU store with a TTL, configured by `IDEMPOTENCY_MAX_KEYS` and
+`IDEMPOTENCY_TTL_SECONDS`. Each worker process keeps its own store.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+# Longest accepted Idempotency-Key header value
+MAX_KEY_LENGTH = 255
+
+ResponseT = TypeVar("ResponseT")
+
+
+class IdempotencyStore:
+    """
+    Bounded store of request fingerprints and responses keyed by (namespace, idempotency key).
+
+    Args:
+        max_keys (int): Maximum number of keys kept before the least recently used is evicted.
+        ttl (float): Seconds a key stays valid after its response is stored.
+    """
+
+    def __init__(self, max_keys: int, ttl: float) -> None:
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any], Any]]" = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _lookup(self, entry_key: Tuple[str, str]) -> Optional[Tuple[Dict[str, Any], Any]]:
+        entry = self.entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[entry_key]
+            return None
+        self.entries.move_to_end(entry_key)
+        return entry[1], entry[2]
+
+    def _store(self, entry_key: Tuple[str, str], fingerprint: Dict[str, Any], response: Any) -> None:
+        if self.max_keys <= 0:
+            return
+        self.entries[entry_key] = (time.monotonic() + self.ttl, fingerprint, response)
+        self.entries.move_to_end(entry_key)
+        while len(self.entries) > self.max_keys:
+            self.entries.popitem(last=False)
+
+    async def run(
+        self,
+        namespace: str,
+        key: Optional[str],
+        request: BaseModel,
+        create: Callable[[], Awaitable[ResponseT]],
+    ) -> ResponseT:
+        """
+        Run `create` once per idempotency key and replay its response for retries.
+
+        Args:
+            namespace (str): Endpoint the key belongs to, so keys do not collide across endpoints.
+            key (Optional[str]): The `Idempotency-Key` header; without one `create` always runs.
+            request (BaseModel): The request body, compared against the original on replay.
+            create (Callable): Coroutine function performing the write and returning the response.
+
+        Returns:
+            The response of the original request with this key.
+
+        Raises:
+            HTTPException: If the key is too long, or was already used with a different body.
+        """
+        if key is None:
+            return await create()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+        entry_key = (namespace, key)
+        fingerprint = request.model_dump()
+        while True:
+            entry = self._lookup(entry_key)
+            if entry is not None:
+                if entry[0] != fingerprint:
+                    raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+                return entry[1]
+            pending = self.in_flight.get(entry_key)
+            if pending is None:
+                break
+            await asyncio.shield(pending)
+
+        done = asyncio.get_running_loop().create_future()
+        self.in_flight[entry_key] = done
+        try:
+            response = await create()
+            self._store(entry_key, fingerprint, response)
+            return response
+        finally:
+            del self.in_flight[entry_key]
+            done.set_result(None)
+
+
+idempotency_store = IdempotencyStore(
+    max_keys=int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "100000")),
+    ttl=float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400")),
+)
@@ -0,0 +1,176 @@
+"""
+Request and database metrics in the Prometheus text exposition format.
+
+`MetricsMiddleware` is a plain ASGI middleware, so recording a request costs a few
+dictionary updates and two bisects rather than a wrapped request/response pair. Requests
+are labelled by route template (`/results/{results_id}`), never by raw path, to keep the
+number of series bounded; paths that match no route share the label "unmatched".
+
+Database queries are counted by a `before_cursor_execute` listener (`count_query`) into a
+per-request counter carried in a context variable.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the queries-per-request histogram buckets
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram keyed by a label tuple.
+
+    Bucket counts are stored per bucket and made cumulative only when rendered.
+
+    Args:
+        buckets (Sequence[float]): Sorted bucket upper bounds; +Inf is implied.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        """
+        Add one observation to the series of `labels`.
+        """
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name: str, label_names: Sequence[str]) -> List[str]:
+        """
+        Format every series as Prometheus `_bucket`, `_sum` and `_count` samples.
+        """
+        lines = []
+        for labels, (counts, total, count) in self.series.items():
+            prefix = _labels(label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{name}_bucket{{{prefix}{"," if prefix else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{prefix}}} {total}")
+            lines.append(f"{name}_count{{{prefix}}} {count}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class Metrics:
+    """
+    Process-wide request counters, in-flight gauge and histograms.
+    """
+
+    def __init__(self) -> None:
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.queries_total = 0
+
+    def record(self, method: str, route: str, status: int, elapsed: float, queries: int) -> None:
+        """
+        Record one finished request.
+        """
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.latency.observe((method, route), elapsed)
+        self.queries.observe((method, route), queries)
+        self.queries_total += queries
+
+    def render(self) -> str:
+        """
+        Format all metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP http_requests_total Requests handled, by method, route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for labels, count in self.requests.items():
+            lines.append(f"http_requests_total{{{_labels(('method', 'route', 'status'), labels)}}} {count}")
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds Request latency, by method and route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        lines += self.latency.render("http_request_duration_seconds", ("method", "route"))
+        lines += [
+            "# HELP db_queries_per_request Database statements executed per request.",
+            "# TYPE db_queries_per_request histogram",
+        ]
+        lines += self.queries.render("db_queries_per_request", ("method", "route"))
+        lines += [
+            "# HELP db_queries_total Database statements executed while handling requests.",
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.queries_total}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+# Number of statements executed by the current request, or None outside a request
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    `before_cursor_execute` listener adding one to the current request's query count.
+    """
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request and counting its database queries.
+
+    Args:
+        app: The wrapped ASGI application.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        counter = [0]
+        token = _request_queries.set(counter)
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _request_queries.reset(token)
+            route = scope.get("route")
+            metrics.record(scope["method"], route.path if route is not None else "unmatched",
+                           status[0], elapsed, counter[0])
@@ -9,7 +9,7 @@ Modules:
 """
 
 
-from sqlalchemy import Column, Integer, String, Float, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, BigInteger, DateTime, ForeignKey, Identity, Index
 from sqlalchemy.ext.declarative import declarative_base 
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -23,17 +23,18 @@ class ABTestingDB(Base):
     """
     __tablename__ = "ab_testing"
 
-    test_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    test_id = Column(Integer, Identity(), primary_key=True, index=True)
     test_name = Column(String, nullable=False)
     start_date = Column(String, nullable=False)
     end_date = Column(String, nullable=False)
-    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     landing_page = relationship("LandingPageDB", back_populates="ab_tests")
     product = relationship("ProductDB", back_populates="ab_tests")
-    results = relationship("ResultDB", back_populates="ab_test", cascade="all, delete")
+    results = relationship("ResultDB", back_populates="ab_test", cascade="all, delete", passive_deletes=True)
+    rollup = relationship("ResultRollupDB", back_populates="ab_test", uselist=False, cascade="all, delete", passive_deletes=True)
 
 
 class CustomerDB(Base):
@@ -42,7 +43,7 @@ class CustomerDB(Base):
     Stores information such as customer ID, name, and email.
     """
     __tablename__ = "customers"
-    customer_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    customer_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
 
@@ -57,11 +58,11 @@ class LandingPageDB(Base):
     landing_page_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     variant_type = Column(String, nullable=False)
     page_url = Column(String, nullable=False)
-    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     product = relationship("ProductDB", back_populates="landing_pages")
-    ab_tests = relationship("ABTestingDB", back_populates="landing_page", cascade="all, delete")
+    ab_tests = relationship("ABTestingDB", back_populates="landing_page", cascade="all, delete", passive_deletes=True)
 
 
 class ProductDB(Base):
@@ -71,7 +72,7 @@ class ProductDB(Base):
     """
     __tablename__ = "products"
 
-    product_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    product_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
     product_name = Column(String, nullable=False)
     category = Column(String, nullable=False)
     description = Column(String, nullable=True)
@@ -79,8 +80,8 @@ class ProductDB(Base):
     release_date = Column(String, nullable=False)
 
     # Relationships
-    landing_pages = relationship("LandingPageDB", back_populates="product", cascade="all, delete")
-    ab_tests = relationship("ABTestingDB", back_populates="product", cascade="all, delete")
+    landing_pages = relationship("LandingPageDB", back_populates="product", cascade="all, delete", passive_deletes=True)
+    ab_tests = relationship("ABTestingDB", back_populates="product", cascade="all, delete", passive_deletes=True)
 
 
 class ResultDB(Base):
@@ -89,12 +90,66 @@ class ResultDB(Base):
     Stores metrics like click-through rate, conversion rate, and bounce rate for A/B tests.
     """
     __tablename__ = "results"
+    __table_args__ = (
+        # Serves filtering by test and keyset pagination within a test
+        Index("ix_results_test_id_results_id", "test_id", "results_id"),
+    )
 
-    results_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    results_id = Column(Integer, Identity(), primary_key=True, index=True)
     click_through_rate = Column(Float, nullable=False)
     conversion_rate = Column(Float, nullable=False)
     bounce_rate = Column(Float, nullable=False)
-    test_id = Column(Integer, ForeignKey("ab_testing.test_id"), nullable=False)
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
 
     # Relationships
     ab_test = relationship("ABTestingDB", back_populates="results")
+
+
+class ResultRollupDB(Base):
+    """
+    Database model for per-test rollups of result metrics.
+    Stores count, sum, sum of squares, min and max of each rate column per A/B test.
+    """
+    __tablename__ = "result_rollups"
+
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    click_through_rate_sum = Column(Float, nullable=False, default=0.0)
+    click_through_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    click_through_rate_min = Column(Float, nullable=True)
+    click_through_rate_max = Column(Float, nullable=True)
+    conversion_rate_sum = Column(Float, nullable=False, default=0.0)
+    conversion_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    conversion_rate_min = Column(Float, nullable=True)
+    conversion_rate_max = Column(Float, nullable=True)
+    bounce_rate_sum = Column(Float, nullable=False, default=0.0)
+    bounce_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    bounce_rate_min = Column(Float, nullable=True)
+    bounce_rate_max = Column(Float, nullable=True)
+
+    # Relationships
+    ab_test = relationship("ABTestingDB", back_populates="rollup")
+
+
+class EventDB(Base):
+    """
+    Database model for raw user-level events.
+    Records each exposure, click, conversion or bounce of a customer on a test's landing page.
+    """
+    __tablename__ = "events"
+    __table_args__ = (
+        # Serves reading a test's events in order
+        Index("ix_events_test_id_event_id", "test_id", "event_id"),
+    )
+
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    customer_id = Column(BigInteger().with_variant(Integer, "sqlite"), ForeignKey("customers.customer_id", ondelete="CASCADE"), nullable=False, index=True)
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
+    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Relationships
+    customer = relationship("CustomerDB")
+    ab_test = relationship("ABTestingDB")
+    landing_page = relationship("LandingPageDB")
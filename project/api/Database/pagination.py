@@ -0,0 +1,159 @@
+"""
+Keyset (cursor) pagination helpers for the list endpoints.
+
+Pages are read with `WHERE pk > :last_seen ORDER BY pk LIMIT :n`, so every page costs a
+single index range scan regardless of how deep into the table it is. The position is
+handed to clients as an opaque URL-safe cursor string.
+
+Passing `ids` instead fetches exactly those records with one `WHERE pk IN (...)` query, so
+clients can resolve many IDs in a single request.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Upper bound on the page size a client may request.
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Encode the primary key of the last row on a page as an opaque cursor.
+
+    Args:
+        last_id (int): Primary key of the last row returned.
+
+    Returns:
+        str: URL-safe cursor to pass back as the `cursor` query parameter.
+    """
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor received from the client.
+
+    Returns:
+        int: The primary key after which the next page starts.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+
+def parse_ids(ids: str) -> List[int]:
+    """
+    Parse a comma-separated `ids` query parameter.
+
+    Args:
+        ids (str): IDs such as "1,2,3".
+
+    Returns:
+        List[int]: The distinct IDs in ascending order.
+
+    Raises:
+        HTTPException: If an ID is not an integer or more than `MAX_PAGE_SIZE` are given.
+    """
+    try:
+        parsed = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids may be requested at once")
+    return parsed
+
+
+def seek(query: Select, pk: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Restrict `query` to at most `limit` rows after `cursor` in primary-key order.
+
+    Args:
+        query (Select): Base SELECT statement.
+        pk (Column): Primary key column used as the sort and seek key.
+        cursor (Optional[str]): Cursor from the previous page, or None for the first page.
+        limit (int): Maximum number of rows to read.
+
+    Returns:
+        Select: The keyset-restricted statement.
+    """
+    if cursor is not None:
+        query = query.filter(pk > decode_cursor(cursor))
+    return query.order_by(pk).limit(limit)
+
+
+async def paginate(
+    db: AsyncSession, query: Select, pk: Any, cursor: Optional[str], limit: int, ids: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one page of `query` ordered by `pk`, starting after `cursor`.
+
+    One extra row is read to find out whether a further page exists without a COUNT query.
+    When `ids` is given, the page instead holds the rows with those primary keys, and IDs
+    that do not exist are left out.
+
+    Args:
+        db (AsyncSession): Database session.
+        query (Select): Base SELECT statement for the entity.
+        pk (Column): Primary key column used as the sort and seek key.
+        cursor (Optional[str]): Cursor from the previous page, or None for the first page.
+        limit (int): Maximum number of rows on the page.
+        ids (Optional[List[int]]): Primary keys to fetch instead of a page, as from `parse_ids`.
+
+    Returns:
+        dict: The page `items` and the `next_cursor` (None on the last page).
+    """
+    if ids is not None:
+        return {"items": (await db.scalars(query.filter(pk.in_(ids)).order_by(pk))).all(), "next_cursor": None}
+    rows = (await db.scalars(seek(query, pk, cursor, limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], pk.key))
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+async def paginate_rows(
+    db: AsyncSession, query: Select, pk: Any, cursor: Optional[str], limit: int, ids: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Like `paginate`, but for SELECTs over plain columns; `items` holds row tuples.
+
+    Args:
+        db (AsyncSession): Database session.
+        query (Select): Column SELECT that includes `pk`.
+        pk (Column): Primary key column used as the sort and seek key.
+        cursor (Optional[str]): Cursor from the previous page, or None for the first page.
+        limit (int): Maximum number of rows on the page.
+        ids (Optional[List[int]]): Primary keys to fetch instead of a page, as from `parse_ids`.
+
+    Returns:
+        dict: The page `items` and the `next_cursor` (None on the last page).
+    """
+    if ids is not None:
+        return {"items": (await db.execute(query.filter(pk.in_(ids)).order_by(pk))).all(), "next_cursor": None}
+    rows = (await db.execute(seek(query, pk, cursor, limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]._mapping[pk.key])
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,98 @@
+"""
+Connection pool configuration and checkout statistics.
+
+The pool is sized from environment variables so it can be tuned per deployment without a
+rebuild:
+
+    DB_POOL_SIZE        connections kept open (default 5)
+    DB_MAX_OVERFLOW     extra connections opened under load (default 10)
+    DB_POOL_TIMEOUT     seconds to wait for a free connection before failing (default 30)
+    DB_POOL_RECYCLE     seconds after which a connection is replaced (default 1800)
+    DB_POOL_PRE_PING    test connections on checkout, to survive database restarts (default true)
+
+`TimedQueuePool` records how long each checkout waited so the stats endpoint can show when
+the pool, rather than the database, is the bottleneck.
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+def pool_options() -> Dict[str, Any]:
+    """
+    Read the pool settings from the environment as `create_engine` keyword arguments.
+
+    Returns:
+        dict: `pool_size`, `max_overflow`, `pool_timeout`, `pool_recycle` and `pool_pre_ping`.
+    """
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+class PoolStats:
+    """
+    Counters for connection checkouts: how many, how long they waited and how many timed out.
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float) -> None:
+        """
+        Record one successful checkout that waited `waited` seconds.
+        """
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def report(self, pool: AsyncAdaptedQueuePool) -> Dict[str, Any]:
+        """
+        Combine the counters with the pool's current occupancy.
+
+        Args:
+            pool (AsyncAdaptedQueuePool): The engine's pool.
+
+        Returns:
+            dict: Pool size and occupancy, checkout and timeout counts and wait times in milliseconds.
+        """
+        return {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checkout_wait_avg_ms": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+            "checkout_wait_max_ms": 1000 * self.wait_max,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that reports checkout wait times and timeouts to `pool_stats`.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
@@ -0,0 +1,183 @@
+"""
+SQL statement timing, slow-query log and N+1 detection.
+
+`instrument(engine)` attaches `before_cursor_execute`/`after_cursor_execute` listeners to a
+sync engine (pass `engine.sync_engine` for the async one). Every statement is timed and
+aggregated by shape, meaning the statement text with runs of bind placeholders collapsed
+so that `IN (?, ?, ?)` and `IN (?, ?)` count as one. Settings come from the environment:
+
+    SLOW_QUERY_MS           log statements slower than this many milliseconds (default 200)
+    SLOW_QUERY_EXPLAIN      also log the query plan of slow SELECTs (default false)
+    N_PLUS_ONE_THRESHOLD    warn when one request runs the same shape this often (default 10)
+
+Logged parameters are redacted to their type names. N+1 detection needs
+`QueryLogMiddleware`, which gives every request its own shape counter.
+"""
+
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_MS", "200")) / 1000
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "10"))
+
+# Statement shapes tracked before further shapes are folded into one "other" entry
+MAX_SHAPES = 500
+
+# Runs of qmark, numeric (after renumbering), format and named placeholders, e.g. "?, ?, ?"
+_PLACEHOLDER_RUN = re.compile(r"(\?|\$n|%s|%\(\w+\)s|:\w+)(\s*,\s*(\?|\$n|%s|%\(\w+\)s|:\w+))+")
+# Numbered placeholders, which differ between otherwise identical rows of a multi-row insert
+_NUMBERED = re.compile(r"\$\d+")
+# Repeated parenthesised groups left after collapsing, e.g. multi-row "VALUES (?, ...), (?, ...)"
+_GROUP_RUN = re.compile(r"(\([^()]*\))(\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalise a statement so that executions differing only in parameters compare equal.
+    """
+    shape = _NUMBERED.sub("$n", _WHITESPACE.sub(" ", statement).strip())
+    shape = _PLACEHOLDER_RUN.sub(r"\1, ...", shape)
+    return _GROUP_RUN.sub(r"\1, ...", shape)
+
+
+def redact(parameters: Any) -> Any:
+    """
+    Replace every parameter value by its type name, keeping the structure for the log.
+    """
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) if isinstance(value, (dict, list, tuple)) else f"<{type(value).__name__}>"
+                for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+class QueryStats:
+    """
+    Per-shape execution counts, latency and row counts.
+    """
+
+    def __init__(self) -> None:
+        self.shapes: Dict[str, List[float]] = {}
+
+    def record(self, shape: str, elapsed: float, rows: int) -> None:
+        """
+        Add one execution of `shape`; `rows` is the cursor row count, -1 when unknown.
+        """
+        entry = self.shapes.get(shape)
+        if entry is None:
+            if len(self.shapes) >= MAX_SHAPES:
+                shape = "other"
+                entry = self.shapes.get(shape)
+            if entry is None:
+                entry = self.shapes[shape] = [0, 0.0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        entry[3] += max(rows, 0)
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Return the `limit` shapes with the highest total time, slowest first.
+        """
+        ranked = sorted(self.shapes.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {
+                "statement": shape,
+                "calls": int(calls),
+                "total_ms": 1000 * total,
+                "mean_ms": 1000 * total / calls,
+                "max_ms": 1000 * maximum,
+                "rows": int(rows),
+            }
+            for shape, (calls, total, maximum, rows) in ranked
+        ]
+
+
+query_stats = QueryStats()
+
+# Scope and per-shape execution counts of the current request, or None outside a request
+_request_shapes: ContextVar[Optional[Tuple[dict, Dict[str, int]]]] = ContextVar("request_shapes", default=None)
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[List[Any]]:
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return cursor.fetchall()
+    except Exception:
+        logger.debug("Could not explain slow query", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._query_started
+    shape = statement_shape(statement)
+    query_stats.record(shape, elapsed, cursor.rowcount)
+
+    if elapsed >= SLOW_QUERY_SECONDS:
+        plan = None
+        if SLOW_QUERY_EXPLAIN and not executemany and shape.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+            plan = _explain(conn, statement, parameters)
+        logger.warning("Slow query (%.1f ms): %s; parameters: %s%s", 1000 * elapsed, shape,
+                       redact(parameters), f"; plan: {plan}" if plan is not None else "")
+
+    request = _request_shapes.get()
+    if request is not None:
+        scope, shapes = request
+        count = shapes[shape] = shapes.get(shape, 0) + 1
+        if count == N_PLUS_ONE_THRESHOLD:
+            route = scope.get("route")
+            logger.warning("Possible N+1 query: %s %s ran the same statement %d times: %s",
+                           scope["method"], route.path if route is not None else scope["path"], count, shape)
+
+
+def instrument(engine: Engine) -> None:
+    """
+    Attach the timing listeners to a sync engine.
+
+    Args:
+        engine (Engine): The engine to instrument; use `AsyncEngine.sync_engine` for async engines.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryLogMiddleware:
+    """
+    ASGI middleware giving each HTTP request its own statement-shape counter for N+1 detection.
+
+    Args:
+        app: The wrapped ASGI application.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_shapes.set((scope, {}))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_shapes.reset(token)
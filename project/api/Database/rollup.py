@@ -0,0 +1,183 @@
+"""
+Incremental maintenance of the per-test result rollups.
+
+Every result write adjusts the `result_rollups` row of its test in the same transaction:
+inserts add to count, sum and sum of squares and widen min/max with an upsert; updates and
+deletes subtract their old values. Min/max cannot be shrunk incrementally, so they are
+recomputed for the test only when a removed value was one of the extremes.
+
+Run `python -m Database.rollup` from the API directory to create the table if needed and
+rebuild every rollup from the results table.
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, Mapping
+
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import UPSERT_DIALECTS, SessionLocal, engine
+from .models import ResultDB, ResultRollupDB
+
+METRICS = ("click_through_rate", "conversion_rate", "bounce_rate")
+
+
+def rollup_column(metric: str, statistic: str) -> Any:
+    """
+    Return the rollup column holding `statistic` ("sum", "sum_sq", "min" or "max") of `metric`.
+    """
+    return getattr(ResultRollupDB, f"{metric}_{statistic}")
+
+
+def _smaller(current: Any, candidate: Any) -> Any:
+    return case((or_(current.is_(None), candidate < current), candidate), else_=current)
+
+
+def _larger(current: Any, candidate: Any) -> Any:
+    return case((or_(current.is_(None), candidate > current), candidate), else_=current)
+
+
+async def add_results(db: AsyncSession, rows: Iterable[Mapping[str, Any]]) -> None:
+    """
+    Fold newly written results into their tests' rollups.
+
+    Rows are aggregated per test in memory first, so a bulk insert costs one upsert per
+    distinct test rather than one per row.
+
+    Args:
+        db (AsyncSession): Session whose transaction holds the result writes.
+        rows (Iterable[Mapping]): Results with `test_id` and the three rate columns.
+    """
+    deltas: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        delta = deltas.get(row["test_id"])
+        if delta is None:
+            delta = deltas[row["test_id"]] = {"count": 0}
+            for metric in METRICS:
+                delta.update({f"{metric}_sum": 0.0, f"{metric}_sum_sq": 0.0,
+                              f"{metric}_min": row[metric], f"{metric}_max": row[metric]})
+        delta["count"] += 1
+        for metric in METRICS:
+            value = row[metric]
+            delta[f"{metric}_sum"] += value
+            delta[f"{metric}_sum_sq"] += value * value
+            delta[f"{metric}_min"] = min(delta[f"{metric}_min"], value)
+            delta[f"{metric}_max"] = max(delta[f"{metric}_max"], value)
+
+    upsert = UPSERT_DIALECTS[db.bind.dialect.name]
+    # Upsert in test order, so concurrent writers lock rollup rows in the same order
+    for test_id, delta in sorted(deltas.items()):
+        statement = upsert(ResultRollupDB).values(test_id=test_id, **delta)
+        excluded = statement.excluded
+        changes = {"count": ResultRollupDB.count + excluded.count}
+        for metric in METRICS:
+            for statistic in ("sum", "sum_sq"):
+                column = rollup_column(metric, statistic)
+                changes[column.key] = column + excluded[column.key]
+            minimum, maximum = rollup_column(metric, "min"), rollup_column(metric, "max")
+            changes[minimum.key] = _smaller(minimum, excluded[minimum.key])
+            changes[maximum.key] = _larger(maximum, excluded[maximum.key])
+        await db.execute(statement.on_conflict_do_update(index_elements=[ResultRollupDB.test_id], set_=changes))
+
+
+async def lock_rollups(db: AsyncSession, test_ids: Iterable[int]) -> None:
+    """
+    Lock the rollup rows of several tests in test order before changing them.
+
+    Writes that touch more than one rollup row must take the row locks in a consistent
+    order, or two of them moving results in opposite directions deadlock.
+
+    Args:
+        db (AsyncSession): Session whose transaction holds the result write.
+        test_ids (Iterable[int]): The tests whose rollups will be changed.
+    """
+    await db.execute(
+        select(ResultRollupDB.test_id)
+        .filter(ResultRollupDB.test_id.in_(sorted(set(test_ids))))
+        .order_by(ResultRollupDB.test_id)
+        .with_for_update()
+    )
+
+
+async def remove_result(db: AsyncSession, row: Mapping[str, Any]) -> None:
+    """
+    Take a deleted or overwritten result out of its test's rollup.
+
+    Must be called after the result row itself has been changed in the database, so that
+    a min/max recomputation sees the new state.
+
+    Args:
+        db (AsyncSession): Session whose transaction holds the result write.
+        row (Mapping): The result's previous `test_id` and rate values.
+    """
+    changes = {"count": ResultRollupDB.count - 1}
+    for metric in METRICS:
+        value = row[metric]
+        for statistic, amount in (("sum", value), ("sum_sq", value * value)):
+            column = rollup_column(metric, statistic)
+            changes[column.key] = column - amount
+    extremes = [
+        column
+        for metric in METRICS
+        for column in (rollup_column(metric, "min"), rollup_column(metric, "max"))
+    ]
+    current = (await db.execute(
+        update(ResultRollupDB)
+        .filter(ResultRollupDB.test_id == row["test_id"])
+        .values(changes)
+        .returning(*extremes)
+    )).first()
+    if current is None:
+        return
+
+    if any(current[2 * index] == row[metric] or current[2 * index + 1] == row[metric]
+           for index, metric in enumerate(METRICS)):
+        aggregates = []
+        for metric in METRICS:
+            aggregates += [func.min(getattr(ResultDB, metric)), func.max(getattr(ResultDB, metric))]
+        recomputed = (await db.execute(select(*aggregates).filter(ResultDB.test_id == row["test_id"]))).one()
+        await db.execute(
+            update(ResultRollupDB)
+            .filter(ResultRollupDB.test_id == row["test_id"])
+            .values(dict(zip((column.key for column in extremes), recomputed)))
+        )
+
+
+async def rebuild_rollups(db: AsyncSession) -> None:
+    """
+    Recompute every rollup from the results table in one transaction.
+
+    Args:
+        db (AsyncSession): Database session.
+    """
+    aggregates = [ResultDB.test_id, func.count(ResultDB.results_id)]
+    columns = [ResultRollupDB.test_id, ResultRollupDB.count]
+    for metric in METRICS:
+        value = getattr(ResultDB, metric)
+        aggregates += [func.sum(value), func.sum(value * value), func.min(value), func.max(value)]
+        columns += [rollup_column(metric, statistic) for statistic in ("sum", "sum_sq", "min", "max")]
+
+    await db.execute(delete(ResultRollupDB))
+    await db.execute(
+        insert(ResultRollupDB).from_select(
+            [column.key for column in columns],
+            select(*aggregates).group_by(ResultDB.test_id),
+        )
+    )
+    await db.commit()
+
+
+async def main() -> None:
+    """
+    Create the rollup table if it does not exist and rebuild all rollups.
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(lambda sync_connection: ResultRollupDB.__table__.create(sync_connection, checkfirst=True))
+    async with SessionLocal() as db:
+        await rebuild_rollups(db)
+    # Close pooled connections so the process can exit (aiosqlite keeps a thread per connection)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
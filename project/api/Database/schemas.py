@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Generic, Literal, Optional, List, TypeVar
 
 # --- Customer Schemas ---
 
@@ -80,6 +81,25 @@ class ProductUpdate(BaseModel):
     release_date: Optional[str] = None
 
 
+# --- Landing Page Schemas ---
+
+"""
+Schemas for reading landing page data.
+"""
+
+class LandingPage(BaseModel):
+    """
+    Schema for retrieving landing page data from the database.
+    """
+    landing_page_id: int
+    variant_type: str
+    page_url: str
+    product_id: int
+
+    class Config:
+        orm_mode = True
+
+
 # --- AB Testing Schemas ---
 
 """
@@ -162,3 +182,140 @@ class ResultUpdate(BaseModel):
     conversion_rate: Optional[float] = None
     bounce_rate: Optional[float] = None
     test_id: Optional[int] = None
+
+
+# --- Assignment Schemas ---
+
+"""
+Schemas for variant assignment.
+"""
+
+class Assignment(BaseModel):
+    """
+    Schema for the variant of an A/B test assigned to a customer.
+    """
+    test_id: int
+    customer_id: int
+    variant_type: str
+    landing_page_id: int
+    page_url: str
+
+
+# --- Event Schemas ---
+
+"""
+Schemas for ingesting raw user-level events.
+"""
+
+class EventCreate(BaseModel):
+    """
+    Schema for one raw event. `occurred_at` defaults to the time the API accepts the event.
+    """
+    event_type: Literal["exposure", "click", "conversion", "bounce"]
+    customer_id: int
+    test_id: int
+    landing_page_id: int
+    occurred_at: Optional[datetime] = None
+
+
+# --- Expanded Schemas ---
+
+"""
+Schemas for A/B tests returned together with related records (`?expand=`).
+"""
+
+class ABTestExpanded(ABTest):
+    """
+    Schema for an A/B test with the related records named in `expand`. Relations that were
+    not requested are left unset and omitted from the response.
+    """
+    product: Optional[Product] = None
+    landing_page: Optional[LandingPage] = None
+    results: Optional[List[Result]] = None
+
+
+# --- Pagination Schemas ---
+
+"""
+Schemas for paginated list responses.
+"""
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """
+    Schema for one page of a list endpoint. Pass `next_cursor` back as the `cursor`
+    query parameter to fetch the following page; it is None on the last page.
+    """
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+
+
+# --- Summary Schemas ---
+
+"""
+Schemas for aggregate statistics computed in the database.
+"""
+
+class MetricSummary(BaseModel):
+    """
+    Schema for descriptive statistics of one rate column.
+    """
+    count: int
+    mean: Optional[float] = None
+    variance: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    ci_lower: Optional[float] = None
+    ci_upper: Optional[float] = None
+
+
+class ABTestSummary(BaseModel):
+    """
+    Schema for the statistical summary of an A/B test's results.
+    """
+    test_id: int
+    count: int
+    confidence: float
+    click_through_rate: MetricSummary
+    conversion_rate: MetricSummary
+    bounce_rate: MetricSummary
+
+
+class Comparison(BaseModel):
+    """
+    Schema for one significance test of an A/B test against its baseline. Statistics are
+    null when either side has too little data.
+    """
+    metric: str
+    test: Literal["welch_t", "two_proportion_z"]
+    difference: Optional[float] = None
+    ci_lower: Optional[float] = None
+    ci_upper: Optional[float] = None
+    statistic: Optional[float] = None
+    p_value: Optional[float] = None
+    adjusted_p_value: Optional[float] = None
+    significant: bool
+
+
+class TestVerdict(BaseModel):
+    """
+    Schema for the significance tests of one A/B test against the other tests of its product.
+    """
+    test_id: int
+    product_id: int
+    count: int
+    baseline_count: int
+    exposures: int
+    significant: bool
+    comparisons: List[Comparison]
+
+
+class SignificanceReport(BaseModel):
+    """
+    Schema for the verdicts of every A/B test, adjusted together for multiple comparisons.
+    """
+    confidence: float
+    correction: Literal["holm", "bh", "bonferroni"]
+    tests: List[TestVerdict]
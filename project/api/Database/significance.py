@@ -0,0 +1,324 @@
+"""
+Vectorized significance tests over every A/B test at once.
+
+Each test is compared against its baseline, the pooled data of the other tests of the same
+product:
+
+- the three rate columns with Welch's t-test, from the sufficient statistics in
+  `result_rollups` (count, sum, sum of squares);
+- click-through and conversion as proportions of exposures with a two-proportion z-test,
+  from the raw event counts in `events`.
+
+Every statistic, p-value and confidence interval is computed for all tests in one pass of
+array operations, and the p-values of all comparisons are then adjusted together for
+multiple comparisons. The Student t tail uses the regularized incomplete beta function
+(continued fraction). t quantiles start from the Cornish-Fisher expansion and are refined
+with Newton steps on that tail, since the expansion alone is too small at low degrees of
+freedom.
+"""
+
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import ABTestingDB, EventDB, ResultRollupDB
+from .rollup import METRICS, rollup_column
+
+CORRECTIONS = ("holm", "bh", "bonferroni")
+
+# (metric, event type counted as a success out of exposures) for the two-proportion tests
+PROPORTIONS = (("click_through_rate", "click"), ("conversion_rate", "conversion"))
+
+_lgamma = np.frompyfunc(math.lgamma, 1, 1)
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def _betacf(a: np.ndarray, b: np.ndarray, x: np.ndarray, iterations: int = 300) -> np.ndarray:
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = np.ones_like(x)
+    d = 1.0 - qab * x / qap
+    d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+    h = d.copy()
+    for m in range(1, iterations + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1.0 + aa / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            delta = d * c
+            h = h * delta
+        if np.all(np.abs(delta - 1.0) < 1e-14):
+            break
+    return h
+
+
+def betainc(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Regularized incomplete beta function I_x(a, b), elementwise.
+    """
+    a, b, x = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (a, b, x)))
+    x = np.clip(x, 0.0, 1.0)
+    inner = (x > 0.0) & (x < 1.0)
+    safe_x = np.where(inner, x, 0.5)
+    log_front = (
+        np.asarray(_lgamma(a + b) - _lgamma(a) - _lgamma(b), dtype=float)
+        + a * np.log(safe_x) + b * np.log1p(-safe_x)
+    )
+    front = np.exp(log_front)
+    # The continued fraction converges fast for x < (a + 1) / (a + b + 2); elsewhere use
+    # I_x(a, b) = 1 - I_(1-x)(b, a), so each element is evaluated in its convergent form
+    direct = safe_x < (a + 1.0) / (a + b + 2.0)
+    fraction = _betacf(np.where(direct, a, b), np.where(direct, b, a), np.where(direct, safe_x, 1.0 - safe_x))
+    result = np.where(direct, front * fraction / a, 1.0 - front * fraction / b)
+    return np.where(inner, result, x)
+
+
+def t_two_sided_p(t: np.ndarray, df: np.ndarray) -> np.ndarray:
+    """
+    Two-sided p-value of Student's t statistic with `df` degrees of freedom.
+    """
+    return betainc(df / 2.0, np.full_like(df, 0.5), df / (df + t * t))
+
+
+def normal_two_sided_p(z: np.ndarray) -> np.ndarray:
+    """
+    Two-sided p-value of a standard normal statistic.
+    """
+    return np.asarray(_erfc(np.abs(z) / math.sqrt(2.0)), dtype=float)
+
+
+def t_quantile(p: float, df: np.ndarray, iterations: int = 50) -> np.ndarray:
+    """
+    Quantile of Student's t distribution.
+
+    Starts from the Cornish-Fisher expansion around the normal quantile, which is too small
+    at low df (11.3 instead of 12.71 at df=1, p=0.975), and refines it with Newton steps on
+    `t_two_sided_p`. The tail is convex, so the steps approach the root from below without
+    overshooting.
+    """
+    df = np.atleast_1d(np.asarray(df, dtype=float))
+    z = NormalDist().inv_cdf(max(p, 1 - p))
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    with np.errstate(invalid="ignore"):
+        t = z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+    target = 2 * min(p, 1 - p)
+    # Refine only the elements that have not converged yet
+    active = np.flatnonzero(np.isfinite(t) & (df > 0))
+    t = t.copy()
+    for _ in range(iterations):
+        if active.size == 0:
+            break
+        t_active, df_active = t[active], df[active]
+        log_density = (
+            np.asarray(_lgamma((df_active + 1) / 2) - _lgamma(df_active / 2), dtype=float)
+            - 0.5 * np.log(df_active * math.pi)
+            - (df_active + 1) / 2 * np.log1p(t_active * t_active / df_active)
+        )
+        step = (t_two_sided_p(t_active, df_active) - target) / (2 * np.exp(log_density))
+        t[active] = t_active + step
+        active = active[np.abs(step) > 1e-10 * np.abs(t_active)]
+    return t if p >= 0.5 else -t
+
+
+def welch_t_test(n1: np.ndarray, sum1: np.ndarray, sum_sq1: np.ndarray,
+                 n2: np.ndarray, sum2: np.ndarray, sum_sq2: np.ndarray, confidence: float) -> Dict[str, np.ndarray]:
+    """
+    Welch's t-test of mean(sample 1) - mean(sample 2) from sufficient statistics.
+
+    Args:
+        n1, sum1, sum_sq1 (np.ndarray): Count, sum and sum of squares of each first sample.
+        n2, sum2, sum_sq2 (np.ndarray): The same for each second sample.
+        confidence (float): Confidence level of the interval for the difference.
+
+    Returns:
+        dict: Arrays `difference`, `ci_lower`, `ci_upper`, `statistic` and `p_value`; NaN where a
+        sample has fewer than two observations or both have zero variance.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean1, mean2 = sum1 / n1, sum2 / n2
+        var1 = np.maximum((sum_sq1 - n1 * mean1 * mean1) / (n1 - 1), 0.0)
+        var2 = np.maximum((sum_sq2 - n2 * mean2 * mean2) / (n2 - 1), 0.0)
+        se1, se2 = var1 / n1, var2 / n2
+        se = np.sqrt(se1 + se2)
+        df = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        valid = (n1 >= 2) & (n2 >= 2) & (se > 0)
+        df = np.where(valid, df, np.nan)
+        difference = mean1 - mean2
+        statistic = np.where(valid, difference / se, np.nan)
+        p_value = np.full_like(statistic, np.nan)
+        p_value[valid] = t_two_sided_p(statistic[valid], df[valid])
+        margin = t_quantile(0.5 + confidence / 2, df) * se
+    return {
+        "difference": np.where(valid, difference, np.nan),
+        "ci_lower": difference - margin,
+        "ci_upper": difference + margin,
+        "statistic": statistic,
+        "p_value": p_value,
+    }
+
+
+def two_proportion_z_test(x1: np.ndarray, n1: np.ndarray, x2: np.ndarray, n2: np.ndarray,
+                          confidence: float) -> Dict[str, np.ndarray]:
+    """
+    Two-proportion z-test of x1/n1 - x2/n2.
+
+    The test statistic uses the pooled proportion; the confidence interval uses the
+    unpooled (Wald) standard error.
+
+    Returns:
+        dict: Arrays `difference`, `ci_lower`, `ci_upper`, `statistic` and `p_value`; NaN where
+        either sample is empty or the pooled proportion is 0 or 1.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p1, p2 = x1 / n1, x2 / n2
+        pooled = (x1 + x2) / (n1 + n2)
+        se_pooled = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        valid = (n1 > 0) & (n2 > 0) & (se_pooled > 0)
+        difference = p1 - p2
+        statistic = np.where(valid, difference / se_pooled, np.nan)
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+    return {
+        "difference": np.where(valid, difference, np.nan),
+        "ci_lower": np.where(valid, difference - margin, np.nan),
+        "ci_upper": np.where(valid, difference + margin, np.nan),
+        "statistic": statistic,
+        "p_value": normal_two_sided_p(statistic),
+    }
+
+
+def adjust_p_values(p_values: np.ndarray, correction: str) -> np.ndarray:
+    """
+    Adjust a family of p-values for multiple comparisons; NaNs are left out of the family.
+
+    Args:
+        p_values (np.ndarray): Raw p-values.
+        correction (str): "holm" (Holm-Bonferroni, controls the family-wise error rate),
+            "bh" (Benjamini-Hochberg, controls the false discovery rate) or "bonferroni".
+
+    Returns:
+        np.ndarray: Adjusted p-values, capped at 1.
+    """
+    adjusted = np.full_like(p_values, np.nan)
+    finite = np.flatnonzero(~np.isnan(p_values))
+    m = finite.size
+    if m == 0:
+        return adjusted
+    order = finite[np.argsort(p_values[finite], kind="stable")]
+    ranked = p_values[order]
+    if correction == "bonferroni":
+        values = ranked * m
+    elif correction == "holm":
+        values = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    else:
+        values = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    adjusted[order] = np.minimum(values, 1.0)
+    return adjusted
+
+
+def _rest_of_group(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    For each element, the sum of `values` over the other elements of its group.
+    """
+    return np.bincount(groups, weights=values)[groups] - values
+
+
+async def significance_report(db: AsyncSession, confidence: float, correction: str) -> Dict[str, Any]:
+    """
+    Compare every A/B test against the other tests of its product.
+
+    Reads one row per test from the rollups and one count per test and event type from the
+    events table, then runs all tests in a single vectorized pass.
+
+    Args:
+        db (AsyncSession): Database session.
+        confidence (float): Confidence level of the intervals; 1 - confidence is the significance level.
+        correction (str): Multiple-comparison correction, one of `CORRECTIONS`.
+
+    Returns:
+        dict: `confidence`, `correction` and one verdict per test with its comparisons.
+    """
+    rollup_columns = [rollup_column(metric, statistic) for metric in METRICS for statistic in ("sum", "sum_sq")]
+    rows = (await db.execute(
+        select(ABTestingDB.test_id, ABTestingDB.product_id, func.coalesce(ResultRollupDB.count, 0),
+               *(func.coalesce(column, 0.0) for column in rollup_columns))
+        .outerjoin(ResultRollupDB, ResultRollupDB.test_id == ABTestingDB.test_id)
+        .order_by(ABTestingDB.test_id)
+    )).all()
+    if not rows:
+        return {"confidence": confidence, "correction": correction, "tests": []}
+
+    data = np.array(rows, dtype=float).reshape(len(rows), -1)
+    test_ids = data[:, 0].astype(np.int64)
+    _, groups = np.unique(data[:, 1], return_inverse=True)
+    count = data[:, 2]
+    position = {int(test_id): index for index, test_id in enumerate(test_ids)}
+
+    event_counts: Dict[str, np.ndarray] = {name: np.zeros(len(rows)) for name in ("exposure", "click", "conversion")}
+    for test_id, event_type, events in (await db.execute(
+        select(EventDB.test_id, EventDB.event_type, func.count())
+        .filter(EventDB.event_type.in_(event_counts))
+        .group_by(EventDB.test_id, EventDB.event_type)
+    )).all():
+        if test_id in position:
+            event_counts[event_type][position[test_id]] = events
+
+    comparisons: List[Tuple[str, str, Dict[str, np.ndarray]]] = []
+    rest_count = _rest_of_group(groups, count)
+    for index, metric in enumerate(METRICS):
+        total, total_sq = data[:, 3 + 2 * index], data[:, 4 + 2 * index]
+        comparisons.append((metric, "welch_t", welch_t_test(
+            count, total, total_sq,
+            rest_count, _rest_of_group(groups, total), _rest_of_group(groups, total_sq),
+            confidence,
+        )))
+    exposures = event_counts["exposure"]
+    rest_exposures = _rest_of_group(groups, exposures)
+    for metric, event_type in PROPORTIONS:
+        successes = event_counts[event_type]
+        comparisons.append((metric, "two_proportion_z", two_proportion_z_test(
+            successes, exposures, _rest_of_group(groups, successes), rest_exposures, confidence,
+        )))
+
+    adjusted = adjust_p_values(np.concatenate([result["p_value"] for _, _, result in comparisons]), correction)
+    alpha = 1 - confidence
+    for index, (_, _, result) in enumerate(comparisons):
+        result["adjusted_p_value"] = adjusted[index * len(rows):(index + 1) * len(rows)]
+        result["significant"] = result["adjusted_p_value"] < alpha
+
+    # Convert each column to Python values once; NaN becomes None (null in the response)
+    columns = [
+        (metric, test, {
+            key: (array.tolist() if array.dtype == bool else np.where(np.isnan(array), None, array).tolist())
+            for key, array in result.items()
+        })
+        for metric, test, result in comparisons
+    ]
+    significant = np.logical_or.reduce([result["significant"] for _, _, result in comparisons]).tolist()
+    tests = []
+    for row, (test_id, product_id, test_count, baseline_count, test_exposures) in enumerate(zip(
+        test_ids.tolist(), data[:, 1].astype(np.int64).tolist(), count.astype(np.int64).tolist(),
+        rest_count.astype(np.int64).tolist(), exposures.astype(np.int64).tolist(),
+    )):
+        tests.append({
+            "test_id": test_id,
+            "product_id": product_id,
+            "count": test_count,
+            "baseline_count": baseline_count,
+            "exposures": test_exposures,
+            "significant": significant[row],
+            "comparisons": [
+                {"metric": metric, "test": test, **{key: values[row] for key, values in result.items()}}
+                for metric, test, result in columns
+            ],
+        })
+    return {"confidence": confidence, "correction": correction, "tests": tests}
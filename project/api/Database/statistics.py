@@ -0,0 +1,50 @@
+"""
+Descriptive statistics derived from a test's rollup.
+
+The `result_rollups` row holds count, sum, sum of squares, min and max for each column;
+everything else is derived here without touching individual rows.
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+from .significance import t_quantile
+
+
+def summarize(count: int, total: Optional[float], total_sq: Optional[float],
+              minimum: Optional[float], maximum: Optional[float], confidence: float) -> Dict[str, Any]:
+    """
+    Build a metric summary from sufficient statistics.
+
+    The confidence interval for the mean uses Student's t quantile with count - 1 degrees
+    of freedom, as the Welch intervals of the significance report do.
+
+    Args:
+        count (int): Number of observations.
+        total (Optional[float]): Sum of the observations.
+        total_sq (Optional[float]): Sum of the squared observations.
+        minimum (Optional[float]): Smallest observation.
+        maximum (Optional[float]): Largest observation.
+        confidence (float): Confidence level of the interval, e.g. 0.95.
+
+    Returns:
+        dict: count, mean, sample variance, min, max and the confidence interval bounds.
+              Fields that are undefined for the sample size are None.
+    """
+    summary = {
+        "count": count, "mean": None, "variance": None, "min": minimum, "max": maximum,
+        "ci_lower": None, "ci_upper": None,
+    }
+    if count == 0:
+        return summary
+
+    mean = total / count
+    summary["mean"] = mean
+    if count < 2:
+        return summary
+
+    # Clamp tiny negative values caused by floating-point cancellation
+    variance = max((total_sq - count * mean * mean) / (count - 1), 0.0)
+    margin = float(t_quantile(0.5 + confidence / 2, count - 1)[0]) * math.sqrt(variance / count)
+    summary.update(variance=variance, ci_lower=mean - margin, ci_upper=mean + margin)
+    return summary
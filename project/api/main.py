@@ -1,71 +1,170 @@
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from typing import List, Dict
-from Database.models import CustomerDB, ProductDB, ABTestingDB, ResultDB
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import FastAPI, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Dict, Literal, Optional, Union
+import orjson
+from Database.models import CustomerDB, ProductDB, ABTestingDB, ResultDB, ResultRollupDB
 from Database.schemas import (
     Customer, CustomerCreate, CustomerUpdate, Product, ProductCreate, ProductUpdate,
-    ABTest, ABTestCreate, ABTestUpdate, Result, ResultCreate, ResultUpdate
+    ABTest, ABTestCreate, ABTestUpdate, Result, ResultCreate, ResultUpdate, Page,
+    ABTestSummary, ABTestExpanded, EventCreate, Assignment, SignificanceReport
 )
-from Database.database import get_db
+from Database.database import POOL_OPTIONS, UPSERT_DIALECTS, engine, get_db
+from Database.admission import AdmissionMiddleware
+from Database.pool import pool_stats
+from Database.metrics import METRICS_MEDIA_TYPE, MetricsMiddleware, count_query, metrics
+from Database.querylog import QueryLogMiddleware, query_stats
+from Database.cache import MISSING, response_cache
+from Database.etag import compute_etag, conditional, conditional_json, etag_matches, tag, tag_json
+from Database.idempotency import idempotency_store
+from Database.events import EVENT_ENQUEUE_TIMEOUT, event_buffer
+from Database.assignment import assignment_snapshot
+from Database.expand import expand_options, expanded_ab_test, parse_expand
+from Database.pagination import MAX_PAGE_SIZE, paginate, paginate_rows, parse_ids
+from Database.columnar import ARROW_MEDIA_TYPE, COLUMNAR_MEDIA_TYPES, arrow_schema, encode_rows
+from Database.export import EXPORT_MEDIA_TYPES, stream_rows
+from Database.statistics import summarize
+from Database.significance import significance_report
+from Database.rollup import METRICS, add_results, lock_rollups, remove_result, rollup_column
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the variant assignment snapshot, and run its periodic reload and the event buffer's
+    background flusher for the lifetime of the app.
+    """
+    await assignment_snapshot.load()
+    assignment_snapshot.start()
+    event_buffer.start()
+    yield
+    await event_buffer.stop()
+    await assignment_snapshot.stop()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    AdmissionMiddleware,
+    pool=engine.pool,
+    pool_capacity=POOL_OPTIONS["pool_size"] + POOL_OPTIONS["max_overflow"],
+    # Event ingest only appends to memory and applies its own backpressure
+    exempt_paths=("/events",),
+)
+app.add_middleware(QueryLogMiddleware)
+app.add_middleware(MetricsMiddleware)
+event.listen(engine.sync_engine, "before_cursor_execute", count_query)
 
-app = FastAPI()
+# Maximum number of rows sent in one multi-row INSERT by the bulk endpoints.
+BULK_INSERT_CHUNK_SIZE = 5000
 
 # --- Customer Endpoints ---
 @app.get("/customers/{customer_id}", response_model=Customer)
-async def get_customer(customer_id: int, db: Session = Depends(get_db)) -> Customer:
+async def get_customer(
+    customer_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[Customer, Response]:
     """
     Retrieve a specific customer by their ID.
 
     Args:
         customer_id (int): ID of the customer to retrieve.
-        db (Session): Database session dependency.
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Customer: The details of the requested customer.
+        An empty 304 response when `If-None-Match` matches the current ETag.
 
     Raises:
         HTTPException: If the customer is not found.
     """
-    customer = db.query(CustomerDB).filter(CustomerDB.customer_id == customer_id).first()
-    if customer is None:
-        raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    entry = response_cache.get("customer", customer_id)
+    if entry is MISSING:
+        generation = response_cache.generation("customer")
+        customer = await db.scalar(select(CustomerDB).filter(CustomerDB.customer_id == customer_id))
+        if customer is None:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        entry = tag(Customer.model_validate(customer, from_attributes=True))
+        response_cache.set("customer", customer_id, entry, generation)
+    return conditional(entry, if_none_match, response)
 
 @app.post("/customers/", response_model=Customer)
-async def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)) -> Customer:
+async def create_customer(
+    customer: CustomerCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Customer:
     """
     Create a new customer record.
 
+    Retries carrying the same `Idempotency-Key` header and body return the first
+    response instead of creating another record.
+
     Args:
         customer (CustomerCreate): The details of the customer to create.
-        db (Session): Database session dependency.
+        idempotency_key (Optional[str]): Key making retries of this request return the original response.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Customer: The newly created customer record.
     """
-    max_id = db.query(CustomerDB.customer_id).order_by(CustomerDB.customer_id.desc()).first()
-    next_id = max_id[0] + 1 if max_id else 1
+    async def create() -> Customer:
+        new_customer = await db.scalar(
+            insert(CustomerDB)
+            .values(name=customer.name, email=customer.email)
+            .returning(CustomerDB)
+        )
+        await db.commit()
+        response_cache.invalidate("customers")
+        return Customer.model_validate(new_customer, from_attributes=True)
+
+    return await idempotency_store.run("customers", idempotency_key, customer, create)
+
+@app.post("/customers/bulk")
+async def upsert_customers_bulk(customers: List[CustomerCreate], db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
+    """
+    Insert or update many customers in a single transaction, keyed by email.
 
-    new_customer = CustomerDB(
-        customer_id=next_id,
-        name=customer.name,
-        email=customer.email
-    )
+    Rows are written with multi-row `INSERT ... ON CONFLICT (email) DO UPDATE` statements in
+    chunks of `BULK_INSERT_CHUNK_SIZE`, so re-importing an export updates names instead of
+    failing on the unique email index. When an email appears more than once in the payload,
+    the last occurrence wins.
 
-    db.add(new_customer)
-    db.commit()
-    db.refresh(new_customer)
-    return new_customer
+    Args:
+        customers (List[CustomerCreate]): The customer records to upsert.
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        dict: The number of distinct customers written.
+    """
+    rows = list({customer.email: {"name": customer.name, "email": customer.email} for customer in customers}.values())
+
+    upsert = UPSERT_DIALECTS[db.bind.dialect.name]
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        statement = upsert(CustomerDB).values(rows[start:start + BULK_INSERT_CHUNK_SIZE])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[CustomerDB.email],
+            set_={"name": statement.excluded.name},
+        ))
+    await db.commit()
+    response_cache.invalidate("customer")
+    response_cache.invalidate("customers")
+
+    return {"upserted": len(rows)}
 
 @app.put("/customers/{customer_id}", response_model=Customer)
-async def update_customer(customer_id: int, customer: CustomerUpdate, db: Session = Depends(get_db)) -> Customer:
+async def update_customer(customer_id: int, customer: CustomerUpdate, db: AsyncSession = Depends(get_db)) -> Customer:
     """
     Update an existing customer's details.
 
     Args:
         customer_id (int): ID of the customer to update.
         customer (CustomerUpdate): The updated details of the customer.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Customer: The updated customer record.
@@ -73,25 +172,30 @@ async def update_customer(customer_id: int, customer: CustomerUpdate, db: Sessio
     Raises:
         HTTPException: If the customer is not found.
     """
-    existing_customer = db.query(CustomerDB).filter(CustomerDB.customer_id == customer_id).first()
-    if not existing_customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
+    changes = {}
     if customer.name:
-        existing_customer.name = customer.name
+        changes["name"] = customer.name
     if customer.email:
-        existing_customer.email = customer.email
-    db.commit()
-    db.refresh(existing_customer)
-    return existing_customer
+        changes["email"] = customer.email
+    query = select(CustomerDB).filter(CustomerDB.customer_id == customer_id)
+    if changes:
+        query = update(CustomerDB).filter(CustomerDB.customer_id == customer_id).values(changes).returning(CustomerDB)
+    updated_customer = await db.scalar(query)
+    if not updated_customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    await db.commit()
+    response_cache.invalidate("customer", customer_id)
+    response_cache.invalidate("customers")
+    return updated_customer
 
 @app.delete("/customers/{customer_id}")
-async def delete_customer(customer_id: int, db: Session = Depends(get_db)) -> Dict[str, str]:
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Delete a customer by their ID.
 
     Args:
         customer_id (int): ID of the customer to delete.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         dict: A confirmation message upon successful deletion.
@@ -99,86 +203,134 @@ async def delete_customer(customer_id: int, db: Session = Depends(get_db)) -> Di
     Raises:
         HTTPException: If the customer is not found.
     """
-    customer = db.query(CustomerDB).filter(CustomerDB.customer_id == customer_id).first()
-    if not customer:
+    deleted_id = await db.scalar(
+        delete(CustomerDB).filter(CustomerDB.customer_id == customer_id).returning(CustomerDB.customer_id)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    db.delete(customer)
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("customer", customer_id)
+    response_cache.invalidate("customers")
     return {"message": "Customer deleted successfully"}
 
-@app.get("/customers/", response_model=List[Customer])
-async def get_all_customers(db: Session = Depends(get_db)) -> List[Customer]:
+@app.get("/customers/", response_model=Page[Customer])
+async def get_all_customers(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    ids: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
-    Retrieve a list of all customers in the database.
+    Retrieve a page of customers ordered by ID, using keyset pagination, or the
+    records with the given `ids`.
+
+    The page is read as plain column tuples and serialized once with orjson; the body has
+    the `Page[Customer]` shape without building a model per row.
 
     Args:
-        db (Session): Database session dependency to query the database.
+        cursor (Optional[str]): Cursor returned with the previous page; omit for the first page.
+        limit (int): Maximum number of records to retrieve.
+        ids (Optional[str]): Comma-separated IDs to fetch in one query instead of a page.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency to query the database.
 
     Returns:
-        List[Customer]: A list of all customers.
+        Response: The customers on this page and the cursor for the next page as JSON.
+        An empty 304 response when `If-None-Match` matches the current ETag.
     """
-    customers = db.query(CustomerDB).all()
-    return customers
+    id_list = parse_ids(ids) if ids is not None else None
+    cache_key = (cursor, limit) if id_list is None else ("ids", tuple(id_list))
+    entry = response_cache.get("customers", cache_key)
+    if entry is MISSING:
+        generation = response_cache.generation("customers")
+        query = select(*(getattr(CustomerDB, field) for field in Customer.model_fields))
+        page = await paginate_rows(db, query, CustomerDB.customer_id, cursor, limit, id_list)
+        entry = tag_json({"items": [row._asdict() for row in page["items"]], "next_cursor": page["next_cursor"]})
+        response_cache.set("customers", cache_key, entry, generation)
+    return conditional_json(entry, if_none_match)
 
 # --- Product Endpoints ---
 @app.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: int, db: Session = Depends(get_db)) -> Product:
+async def get_product(
+    product_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[Product, Response]:
     """
     Retrieve a specific product by its ID.
 
     Args:
         product_id (int): ID of the product to retrieve.
-        db (Session): Database session dependency.
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Product: The details of the requested product.
+        An empty 304 response when `If-None-Match` matches the current ETag.
 
     Raises:
         HTTPException: If the product is not found.
     """
-    product = db.query(ProductDB).filter(ProductDB.product_id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    entry = response_cache.get("product", product_id)
+    if entry is MISSING:
+        generation = response_cache.generation("product")
+        product = await db.scalar(select(ProductDB).filter(ProductDB.product_id == product_id))
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = tag(Product.model_validate(product, from_attributes=True))
+        response_cache.set("product", product_id, entry, generation)
+    return conditional(entry, if_none_match, response)
 
 @app.post("/products/", response_model=Product)
-async def create_product(product: ProductCreate, db: Session = Depends(get_db)) -> Product:
+async def create_product(
+    product: ProductCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Product:
     """
     Create a new product record.
 
+    Retries carrying the same `Idempotency-Key` header and body return the first
+    response instead of creating another record.
+
     Args:
         product (ProductCreate): The details of the product to create.
-        db (Session): Database session dependency.
+        idempotency_key (Optional[str]): Key making retries of this request return the original response.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Product: The newly created product record.
     """
-    max_id = db.query(ProductDB.product_id).order_by(ProductDB.product_id.desc()).first()
-    next_id = max_id[0] + 1 if max_id else 1
-
-    new_product = ProductDB(
-        product_id=next_id,
-        product_name=product.product_name,
-        category=product.category,
-        description=product.description,
-        logo_url=product.logo_url,
-        release_date=product.release_date
-    )
-
-    db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
-    return new_product
+    async def create() -> Product:
+        new_product = await db.scalar(
+            insert(ProductDB)
+            .values(
+                product_name=product.product_name,
+                category=product.category,
+                description=product.description,
+                logo_url=product.logo_url,
+                release_date=product.release_date
+            )
+            .returning(ProductDB)
+        )
+        await db.commit()
+        response_cache.invalidate("products")
+        return Product.model_validate(new_product, from_attributes=True)
+
+    return await idempotency_store.run("products", idempotency_key, product, create)
 
 @app.put("/products/{product_id}", response_model=Product)
-async def update_product(product_id: int, product: ProductUpdate, db: Session = Depends(get_db)) -> Product:
+async def update_product(product_id: int, product: ProductUpdate, db: AsyncSession = Depends(get_db)) -> Product:
     """
     Update an existing product's details.
 
     Args:
         product_id (int): ID of the product to update.
         product (ProductUpdate): The updated details of the product.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Product: The updated product record.
@@ -186,31 +338,36 @@ async def update_product(product_id: int, product: ProductUpdate, db: Session =
     Raises:
         HTTPException: If the product is not found.
     """
-    existing_product = db.query(ProductDB).filter(ProductDB.product_id == product_id).first()
-    if not existing_product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    changes = {}
     if product.product_name:
-        existing_product.product_name = product.product_name
+        changes["product_name"] = product.product_name
     if product.category:
-        existing_product.category = product.category
+        changes["category"] = product.category
     if product.description:
-        existing_product.description = product.description
+        changes["description"] = product.description
     if product.logo_url:
-        existing_product.logo_url = product.logo_url
+        changes["logo_url"] = product.logo_url
     if product.release_date:
-        existing_product.release_date = product.release_date
-    db.commit()
-    db.refresh(existing_product)
-    return existing_product
+        changes["release_date"] = product.release_date
+    query = select(ProductDB).filter(ProductDB.product_id == product_id)
+    if changes:
+        query = update(ProductDB).filter(ProductDB.product_id == product_id).values(changes).returning(ProductDB)
+    updated_product = await db.scalar(query)
+    if not updated_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    await db.commit()
+    response_cache.invalidate("product", product_id)
+    response_cache.invalidate("products")
+    return updated_product
 
 @app.delete("/products/{product_id}")
-async def delete_product(product_id: int, db: Session = Depends(get_db)) -> Dict[str, str]:
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Delete a product by its ID.
 
     Args:
         product_id (int): ID of the product to delete.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         dict: A confirmation message upon successful deletion.
@@ -218,87 +375,198 @@ async def delete_product(product_id: int, db: Session = Depends(get_db)) -> Dict
     Raises:
         HTTPException: If the product is not found.
     """
-    product = db.query(ProductDB).filter(ProductDB.product_id == product_id).first()
-    if not product:
+    # Landing pages, AB tests, results and rollups go with it through ON DELETE CASCADE
+    deleted_id = await db.scalar(
+        delete(ProductDB).filter(ProductDB.product_id == product_id).returning(ProductDB.product_id)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    db.delete(product)
-    db.commit()
+    await db.commit()
+    # Deleting a product cascades to its landing pages, AB tests and their results
+    response_cache.invalidate("product", product_id)
+    for namespace in ("products", "abtest", "abtests", "results"):
+        response_cache.invalidate(namespace)
+    await assignment_snapshot.refresh(db)
     return {"message": "Product deleted successfully"}
 
-@app.get("/products/", response_model=List[Product])
-async def get_all_products(db: Session = Depends(get_db)) -> List[Product]:
+@app.get("/products/", response_model=Page[Product])
+async def get_all_products(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    ids: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[Page[Product], Response]:
     """
-    Retrieve a list of all products in the database.
+    Retrieve a page of products ordered by ID, using keyset pagination, or the
+    records with the given `ids`.
 
     Args:
-        db (Session): Database session dependency to query the database.
+        cursor (Optional[str]): Cursor returned with the previous page; omit for the first page.
+        limit (int): Maximum number of records to retrieve.
+        ids (Optional[str]): Comma-separated IDs to fetch in one query instead of a page.
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency to query the database.
 
     Returns:
-        List[Product]: A list of all products.
+        Page[Product]: The products on this page and the cursor for the next page.
+        An empty 304 response when `If-None-Match` matches the current ETag.
     """
-    products = db.query(ProductDB).all()
-    return products
+    id_list = parse_ids(ids) if ids is not None else None
+    cache_key = (cursor, limit) if id_list is None else ("ids", tuple(id_list))
+    entry = response_cache.get("products", cache_key)
+    if entry is MISSING:
+        generation = response_cache.generation("products")
+        entry = tag(Page[Product].model_validate(
+            await paginate(db, select(ProductDB), ProductDB.product_id, cursor, limit, id_list),
+            from_attributes=True
+        ))
+        response_cache.set("products", cache_key, entry, generation)
+    return conditional(entry, if_none_match, response)
 
 # --- AB Testing Endpoints ---
-@app.get("/abtests/{test_id}", response_model=ABTest)
-async def get_ab_test(test_id: int, db: Session = Depends(get_db)) -> ABTest:
+@app.get("/abtests/export")
+async def export_ab_tests(format: Literal["ndjson", "csv", "arrow", "parquet"] = "ndjson") -> StreamingResponse:
+    """
+    Stream every AB test as NDJSON, CSV, Arrow or Parquet through a server-side cursor.
+
+    Args:
+        format (str): Output format, "ndjson" (default), "csv", "arrow" or "parquet".
+
+    Returns:
+        StreamingResponse: The AB test rows, ordered by ID.
+    """
+    query = select(*ABTestingDB.__table__.columns).order_by(ABTestingDB.test_id)
+    return StreamingResponse(
+        stream_rows(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=ab_testing.{format}"},
+    )
+
+@app.get("/abtests/significance", response_model=SignificanceReport)
+async def get_ab_test_significance(
+    confidence: float = Query(0.95, gt=0, lt=1),
+    correction: Literal["holm", "bh", "bonferroni"] = "bh",
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Test every AB test for a significant difference from the other tests of its product.
+
+    The click-through, conversion and bounce rates of the results are compared with Welch's
+    t-test, and the click and conversion events per exposure with a two-proportion z-test.
+    All tests are evaluated in one vectorized pass over the rollups and event counts, and
+    their p-values are adjusted together for multiple comparisons.
+
+    Args:
+        confidence (float): Confidence level of the intervals; a comparison is significant when its
+            adjusted p-value is below 1 - confidence. Defaults to 0.95.
+        correction (str): "bh" (Benjamini-Hochberg, default), "holm" or "bonferroni".
+        db (AsyncSession): Database session dependency to query the database.
+
+    Returns:
+        SignificanceReport: One verdict per AB test, ordered by ID.
+    """
+    return Response(orjson.dumps(await significance_report(db, confidence, correction)), media_type="application/json")
+
+@app.get("/abtests/{test_id}", response_model=ABTestExpanded, response_model_exclude_unset=True)
+async def get_ab_test(
+    test_id: int,
+    response: Response,
+    expand: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[ABTestExpanded, Response]:
     """
     Retrieve an AB test by its ID.
 
+    `expand` names related records to embed: any of "product", "landing_page" and
+    "results". They are loaded eagerly, so the response costs at most two queries.
+    Expanded responses are not cached, since writes to the related tables would make
+    them stale, but still carry an ETag.
+
     Args:
         test_id (int): The ID of the AB test.
-        db (Session): Database session dependency to query the database.
+        response (Response): Response used to set the ETag header.
+        expand (Optional[str]): Comma-separated relations to include.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency to query the database.
 
     Returns:
-        ABTest: The AB test record.
+        ABTestExpanded: The AB test record with the requested relations.
+        An empty 304 response when `If-None-Match` matches the current ETag.
 
     Raises:
-        HTTPException: If the AB test is not found.
+        HTTPException: If the AB test is not found or `expand` names an unknown relation.
     """
-    ab_test = db.query(ABTestingDB).filter(ABTestingDB.test_id == test_id).first()
-    if ab_test is None:
-        raise HTTPException(status_code=404, detail="AB Test not found")
-    return ab_test
+    expansions = parse_expand(expand)
+    if expansions:
+        ab_test = await db.scalar(
+            select(ABTestingDB).filter(ABTestingDB.test_id == test_id).options(*expand_options(expansions))
+        )
+        if ab_test is None:
+            raise HTTPException(status_code=404, detail="AB Test not found")
+        return conditional(tag(expanded_ab_test(ab_test, expansions)), if_none_match, response)
+
+    entry = response_cache.get("abtest", test_id)
+    if entry is MISSING:
+        generation = response_cache.generation("abtest")
+        ab_test = await db.scalar(select(ABTestingDB).filter(ABTestingDB.test_id == test_id))
+        if ab_test is None:
+            raise HTTPException(status_code=404, detail="AB Test not found")
+        entry = tag(ABTest.model_validate(ab_test, from_attributes=True))
+        response_cache.set("abtest", test_id, entry, generation)
+    return conditional(entry, if_none_match, response)
 
 @app.post("/abtests/", response_model=ABTest)
-async def create_ab_test(ab_test: ABTestCreate, db: Session = Depends(get_db)) -> ABTest:
+async def create_ab_test(
+    ab_test: ABTestCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> ABTest:
     """
-    Create a new A/B test in the database, manually assigning an ID.
+    Create a new A/B test in the database. The ID is generated by the database.
+
+    Retries carrying the same `Idempotency-Key` header and body return the first
+    response instead of creating another record.
 
     Args:
         ab_test (ABTestCreate): The details of the A/B test to create.
-        db (Session): Database session dependency.
+        idempotency_key (Optional[str]): Key making retries of this request return the original response.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         ABTest: The newly created A/B test record.
     """
-    max_id = db.query(ABTestingDB.test_id).order_by(ABTestingDB.test_id.desc()).first()
-    next_id = max_id[0] + 1 if max_id else 1
-
-    new_ab_test = ABTestingDB(
-        test_id=next_id,
-        test_name=ab_test.test_name,
-        start_date=ab_test.start_date,
-        end_date=ab_test.end_date,
-        landing_page_id=ab_test.landing_page_id,
-        product_id=ab_test.product_id,
-    )
-
-    db.add(new_ab_test)
-    db.commit()
-    db.refresh(new_ab_test)
-
-    return new_ab_test
+    async def create() -> ABTest:
+        new_ab_test = await db.scalar(
+            insert(ABTestingDB)
+            .values(
+                test_name=ab_test.test_name,
+                start_date=ab_test.start_date,
+                end_date=ab_test.end_date,
+                landing_page_id=ab_test.landing_page_id,
+                product_id=ab_test.product_id,
+            )
+            .returning(ABTestingDB)
+        )
+        await db.commit()
+        response_cache.invalidate("abtests")
+        await assignment_snapshot.refresh(db, new_ab_test.test_id)
+        return ABTest.model_validate(new_ab_test, from_attributes=True)
+
+    return await idempotency_store.run("abtests", idempotency_key, ab_test, create)
 
 @app.put("/abtests/{test_id}", response_model=ABTest)
-async def update_ab_test(test_id: int, ab_test: ABTestUpdate, db: Session = Depends(get_db)) -> ABTest:
+async def update_ab_test(test_id: int, ab_test: ABTestUpdate, db: AsyncSession = Depends(get_db)) -> ABTest:
     """
     Update an existing A/B test record.
 
     Args:
         test_id (int): The ID of the A/B test to update.
         ab_test (ABTestUpdate): Schema with updated values.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         ABTest: The updated A/B test record.
@@ -306,35 +574,30 @@ async def update_ab_test(test_id: int, ab_test: ABTestUpdate, db: Session = Depe
     Raises:
         HTTPException: If the A/B test is not found.
     """
-    existing_ab_test = db.query(ABTestingDB).filter(ABTestingDB.test_id == test_id).first()
+    changes = ab_test.model_dump(exclude_none=True)
+    query = select(ABTestingDB).filter(ABTestingDB.test_id == test_id)
+    if changes:
+        query = update(ABTestingDB).filter(ABTestingDB.test_id == test_id).values(changes).returning(ABTestingDB)
+    updated_ab_test = await db.scalar(query)
 
-    if not existing_ab_test:
+    if not updated_ab_test:
         raise HTTPException(status_code=404, detail="A/B test not found")
 
-    if ab_test.test_name is not None:
-        existing_ab_test.test_name = ab_test.test_name
-    if ab_test.start_date is not None:
-        existing_ab_test.start_date = ab_test.start_date
-    if ab_test.end_date is not None:
-        existing_ab_test.end_date = ab_test.end_date
-    if ab_test.landing_page_id is not None:
-        existing_ab_test.landing_page_id = ab_test.landing_page_id
-    if ab_test.product_id is not None:
-        existing_ab_test.product_id = ab_test.product_id
-
-    db.commit()
-    db.refresh(existing_ab_test)
+    await db.commit()
+    response_cache.invalidate("abtest", test_id)
+    response_cache.invalidate("abtests")
+    await assignment_snapshot.refresh(db, test_id)
 
-    return existing_ab_test
+    return updated_ab_test
 
 @app.delete("/abtests/{test_id}")
-async def delete_ab_test(test_id: int, db: Session = Depends(get_db)) -> Dict[str, str]:
+async def delete_ab_test(test_id: int, db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Delete an AB test by its ID.
 
     Args:
         test_id (int): ID of the AB test to delete.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         dict: A confirmation message upon successful deletion.
@@ -342,89 +605,280 @@ async def delete_ab_test(test_id: int, db: Session = Depends(get_db)) -> Dict[st
     Raises:
         HTTPException: If the AB test is not found.
     """
-    ab_test = db.query(ABTestingDB).filter(ABTestingDB.test_id == test_id).first()
-    if not ab_test:
+    # Results and the rollup go with it through ON DELETE CASCADE
+    deleted_id = await db.scalar(
+        delete(ABTestingDB).filter(ABTestingDB.test_id == test_id).returning(ABTestingDB.test_id)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="AB Test not found")
-
-    db.delete(ab_test)
-    db.commit()
+    await db.commit()
+    # Deleting an AB test cascades to its results
+    response_cache.invalidate("abtest", test_id)
+    response_cache.invalidate("abtests")
+    assignment_snapshot.discard(test_id)
+    response_cache.invalidate("results")
     return {"message": "AB Test deleted successfully"}
 
-@app.get("/abtests/", response_model=List[ABTest])
-async def get_all_ab_tests(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> List[ABTest]:
+@app.get("/abtests/", response_model=Page[ABTestExpanded], response_model_exclude_unset=True)
+async def get_all_ab_tests(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    ids: Optional[str] = None,
+    expand: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[Page[ABTestExpanded], Response]:
     """
-    Retrieve a list of all AB tests with optional pagination.
+    Retrieve a page of AB tests ordered by ID, using keyset pagination, or the
+    records with the given `ids`.
+
+    `expand` embeds related records as in `get_ab_test`; the whole page then costs at most
+    two queries, and is not cached.
+
+    Args:
+        cursor (Optional[str]): Cursor returned with the previous page; omit for the first page.
+        limit (int): Maximum number of records to retrieve.
+        ids (Optional[str]): Comma-separated IDs to fetch in one query instead of a page.
+        expand (Optional[str]): Comma-separated relations to include for every test.
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency to query the database.
+
+    Returns:
+        Page[ABTestExpanded]: The AB test records on this page and the cursor for the next page.
+        An empty 304 response when `If-None-Match` matches the current ETag.
+
+    Raises:
+        HTTPException: If `expand` names an unknown relation.
+    """
+    id_list = parse_ids(ids) if ids is not None else None
+    expansions = parse_expand(expand)
+    if expansions:
+        query = select(ABTestingDB).options(*expand_options(expansions))
+        page = await paginate(db, query, ABTestingDB.test_id, cursor, limit, id_list)
+        page["items"] = [expanded_ab_test(ab_test, expansions) for ab_test in page["items"]]
+        return conditional(tag(Page[ABTestExpanded].model_validate(page)), if_none_match, response)
+
+    cache_key = (cursor, limit) if id_list is None else ("ids", tuple(id_list))
+    entry = response_cache.get("abtests", cache_key)
+    if entry is MISSING:
+        generation = response_cache.generation("abtests")
+        entry = tag(Page[ABTest].model_validate(
+            await paginate(db, select(ABTestingDB), ABTestingDB.test_id, cursor, limit, id_list),
+            from_attributes=True
+        ))
+        response_cache.set("abtests", cache_key, entry, generation)
+    return conditional(entry, if_none_match, response)
+
+@app.get("/abtests/{test_id}/summary", response_model=ABTestSummary)
+async def get_ab_test_summary(
+    test_id: int,
+    confidence: float = Query(0.95, gt=0, lt=1),
+    db: AsyncSession = Depends(get_db)
+) -> ABTestSummary:
+    """
+    Summarize the results of an AB test from its rollup row.
+
+    Count, mean, sample variance, min/max and a confidence interval for the mean are
+    returned for the click-through, conversion and bounce rates. The statistics are derived
+    from the test's maintained rollup, so the cost does not grow with the number of results.
 
     Args:
-        skip (int): Number of records to skip.
-        limit (int): Number of records to retrieve.
-        db (Session): Database session dependency to query the database.
+        test_id (int): The ID of the AB test.
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+        db (AsyncSession): Database session dependency to query the database.
 
     Returns:
-        List[ABTest]: A list of AB test records.
+        ABTestSummary: The per-metric statistics of the test's results.
+
+    Raises:
+        HTTPException: If the AB test is not found.
     """
-    ab_tests = db.query(ABTestingDB).offset(skip).limit(limit).all()
-    return ab_tests
+    row = (await db.execute(
+        select(ABTestingDB.test_id, ResultRollupDB)
+        .outerjoin(ResultRollupDB, ResultRollupDB.test_id == ABTestingDB.test_id)
+        .filter(ABTestingDB.test_id == test_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="AB Test not found")
+
+    rollup = row[1]
+    count = rollup.count if rollup is not None else 0
+    summary = {"test_id": test_id, "count": count, "confidence": confidence}
+    for metric in METRICS:
+        statistics = [
+            getattr(rollup, rollup_column(metric, statistic).key) if rollup is not None else None
+            for statistic in ("sum", "sum_sq", "min", "max")
+        ]
+        summary[metric] = summarize(count, *statistics, confidence)
+    return summary
+
+@app.get("/abtests/{test_id}/assign", response_model=Assignment)
+async def assign_variant(test_id: int, customer_id: int) -> Response:
+    """
+    Assign a customer to a variant of an A/B test and return its landing page.
+
+    The customer is hashed into one of the test's variant types, so repeated calls give
+    the same answer. Assignments are served from an in-memory snapshot of the test
+    configuration and never query the database; the snapshot is refreshed whenever an A/B
+    test is created, updated or deleted.
+
+    Args:
+        test_id (int): The ID of the A/B test.
+        customer_id (int): The ID of the customer to assign.
+
+    Returns:
+        Assignment: The variant type, landing page ID and page URL shown to the customer.
+
+    Raises:
+        HTTPException: If the test is unknown or has no landing pages.
+    """
+    variant = assignment_snapshot.assign(test_id, customer_id)
+    if variant is None:
+        raise HTTPException(status_code=404, detail="AB Test not found")
+    variant_type, landing_page_id, page_url = variant
+    return Response(orjson.dumps({
+        "test_id": test_id,
+        "customer_id": customer_id,
+        "variant_type": variant_type,
+        "landing_page_id": landing_page_id,
+        "page_url": page_url,
+    }), media_type="application/json")
 
 # --- Result Endpoints ---
+@app.get("/results/export")
+async def export_results(test_id: Optional[int] = None, format: Literal["ndjson", "csv", "arrow", "parquet"] = "ndjson") -> StreamingResponse:
+    """
+    Stream results as NDJSON, CSV, Arrow or Parquet through a server-side cursor.
+
+    Memory use stays constant regardless of how many rows are exported.
+
+    Args:
+        test_id (Optional[int]): Only export results for this A/B test.
+        format (str): Output format, "ndjson" (default), "csv", "arrow" or "parquet".
+
+    Returns:
+        StreamingResponse: The result rows, ordered by ID.
+    """
+    query = select(*ResultDB.__table__.columns).order_by(ResultDB.results_id)
+    if test_id is not None:
+        query = query.filter(ResultDB.test_id == test_id)
+    return StreamingResponse(
+        stream_rows(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=results.{format}"},
+    )
+
 @app.get("/results/{results_id}", response_model=Result)
-async def get_result(results_id: int, db: Session = Depends(get_db)) -> Result:
+async def get_result(
+    results_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Union[Result, Response]:
     """
     Retrieve a specific result by its ID.
 
     Args:
         results_id (int): ID of the result to retrieve.
-        db (Session): Database session dependency.
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Result: The details of the requested result.
+        An empty 304 response when `If-None-Match` matches the current ETag.
 
     Raises:
         HTTPException: If the result is not found.
     """
-    result = db.query(ResultDB).filter(ResultDB.results_id == results_id).first()
+    result = await db.scalar(select(ResultDB).filter(ResultDB.results_id == results_id))
     if result is None:
         raise HTTPException(status_code=404, detail="Result not found")
-    return result
+    return conditional(tag(Result.model_validate(result, from_attributes=True)), if_none_match, response)
 
 @app.post("/results/", response_model=Result)
-async def create_result(result: ResultCreate, db: Session = Depends(get_db)) -> Result:
+async def create_result(
+    result: ResultCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Result:
     """
-    Create a new result record for an A/B test, manually assigning an ID.
+    Create a new result record for an A/B test. The ID is generated by the database.
+
+    Retries carrying the same `Idempotency-Key` header and body return the first
+    response instead of creating another record.
 
     Args:
         result (ResultCreate): The details of the result to create.
-        db (Session): Database session dependency.
+        idempotency_key (Optional[str]): Key making retries of this request return the original response.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Result: The newly created result record.
     """
-    max_id = db.query(ResultDB.results_id).order_by(ResultDB.results_id.desc()).first()
-    next_id = max_id[0] + 1 if max_id else 1
+    async def create() -> Result:
+        new_result = await db.scalar(
+            insert(ResultDB)
+            .values(
+                click_through_rate=result.click_through_rate,
+                conversion_rate=result.conversion_rate,
+                bounce_rate=result.bounce_rate,
+                test_id=result.test_id,
+            )
+            .returning(ResultDB)
+        )
+        await add_results(db, [result.model_dump()])
+        await db.commit()
+        response_cache.invalidate("results")
+        return Result.model_validate(new_result, from_attributes=True)
+
+    return await idempotency_store.run("results", idempotency_key, result, create)
+
+@app.post("/results/bulk")
+async def create_results_bulk(results: List[ResultCreate], db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
+    """
+    Create many result records in a single transaction.
 
-    new_result = ResultDB(
-        results_id=next_id,
-        click_through_rate=result.click_through_rate,
-        conversion_rate=result.conversion_rate,
-        bounce_rate=result.bounce_rate,
-        test_id=result.test_id,
-    )
+    IDs are generated by the database, and the rows are written with a multi-row INSERT in
+    chunks of `BULK_INSERT_CHUNK_SIZE` so that very large payloads never exceed the driver's
+    bound-parameter limits.
 
-    db.add(new_result)
-    db.commit()
-    db.refresh(new_result)
+    Args:
+        results (List[ResultCreate]): The result records to create.
+        db (AsyncSession): Database session dependency.
 
-    return new_result
+    Returns:
+        dict: The number of inserted rows.
+    """
+    rows = [
+        {
+            "click_through_rate": result.click_through_rate,
+            "conversion_rate": result.conversion_rate,
+            "bounce_rate": result.bounce_rate,
+            "test_id": result.test_id,
+        }
+        for result in results
+    ]
+
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        await db.execute(insert(ResultDB), rows[start:start + BULK_INSERT_CHUNK_SIZE])
+    await add_results(db, rows)
+    await db.commit()
+    response_cache.invalidate("results")
+
+    return {"inserted": len(rows)}
 
 @app.put("/results/{result_id}", response_model=Result)
-async def update_result(result_id: int, result: ResultUpdate, db: Session = Depends(get_db)) -> Result:
+async def update_result(result_id: int, result: ResultUpdate, db: AsyncSession = Depends(get_db)) -> Result:
     """
     Update an existing result record for an A/B test.
 
     Args:
         result_id (int): The ID of the result record to update.
         result (ResultUpdate): Schema with updated result values.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         Result: The updated result record.
@@ -432,33 +886,44 @@ async def update_result(result_id: int, result: ResultUpdate, db: Session = Depe
     Raises:
         HTTPException: If the result is not found.
     """
-    existing_result = db.query(ResultDB).filter(ResultDB.results_id == result_id).first()
-
-    if not existing_result:
+    changes = result.model_dump(exclude_none=True)
+    if not changes:
+        existing_result = await db.scalar(select(ResultDB).filter(ResultDB.results_id == result_id))
+        if not existing_result:
+            raise HTTPException(status_code=404, detail="Result not found")
+        return existing_result
+
+    # The rollup needs the previous values, which UPDATE ... RETURNING cannot report,
+    # so the row is read under a lock before being updated in place.
+    previous = (await db.execute(
+        select(ResultDB.test_id, *(getattr(ResultDB, metric) for metric in METRICS))
+        .filter(ResultDB.results_id == result_id)
+        .with_for_update()
+    )).first()
+
+    if not previous:
         raise HTTPException(status_code=404, detail="Result not found")
 
-    if result.click_through_rate is not None:
-        existing_result.click_through_rate = result.click_through_rate
-    if result.conversion_rate is not None:
-        existing_result.conversion_rate = result.conversion_rate
-    if result.bounce_rate is not None:
-        existing_result.bounce_rate = result.bounce_rate
-    if result.test_id is not None:
-        existing_result.test_id = result.test_id
-
-    db.commit()
-    db.refresh(existing_result)
+    updated_result = await db.scalar(
+        update(ResultDB).filter(ResultDB.results_id == result_id).values(changes).returning(ResultDB)
+    )
+    if updated_result.test_id != previous.test_id:
+        await lock_rollups(db, (previous.test_id, updated_result.test_id))
+    await remove_result(db, previous._mapping)
+    await add_results(db, [{column: getattr(updated_result, column) for column in ("test_id", *METRICS)}])
+    await db.commit()
+    response_cache.invalidate("results")
 
-    return existing_result
+    return updated_result
 
 @app.delete("/results/{results_id}")
-async def delete_result(results_id: int, db: Session = Depends(get_db)) -> Dict[str, str]:
+async def delete_result(results_id: int, db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Delete a result by its ID.
 
     Args:
         results_id (int): ID of the result to delete.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         dict: A confirmation message upon successful deletion.
@@ -466,27 +931,203 @@ async def delete_result(results_id: int, db: Session = Depends(get_db)) -> Dict[
     Raises:
         HTTPException: If the result is not found.
     """
-    result = db.query(ResultDB).filter(ResultDB.results_id == results_id).first()
-    if not result:
+    previous = (await db.execute(
+        delete(ResultDB)
+        .filter(ResultDB.results_id == results_id)
+        .returning(ResultDB.test_id, *(getattr(ResultDB, metric) for metric in METRICS))
+    )).first()
+    if not previous:
         raise HTTPException(status_code=404, detail="Result not found")
 
-    db.delete(result)
-    db.commit()
+    await remove_result(db, previous._mapping)
+    await db.commit()
+    response_cache.invalidate("results")
     return {"message": "Result deleted successfully"}
 
 
-@app.get("/results/", response_model=List[Result])
-async def get_all_results(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> List[Result]:
+@app.get("/results/", response_model=Page[Result])
+async def get_all_results(
+    test_id: Optional[int] = None,
+    min_click_through_rate: Optional[float] = None,
+    max_click_through_rate: Optional[float] = None,
+    min_conversion_rate: Optional[float] = None,
+    max_conversion_rate: Optional[float] = None,
+    min_bounce_rate: Optional[float] = None,
+    max_bounce_rate: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    ids: Optional[str] = None,
+    format: Optional[Literal["json", "arrow", "parquet"]] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Retrieve a page of results ordered by ID, using keyset pagination, or the
+    records with the given `ids`.
+
+    Filters are applied in the database, also to `ids`; rate bounds are inclusive. The page is returned as
+    JSON unless `format` asks for "arrow" or "parquet", or the Accept header is
+    `application/vnd.apache.arrow.stream`. Every format is built straight from the column
+    tuples: JSON is serialized once with orjson in the `Page[Result]` shape, and columnar
+    pages carry the next cursor in the `X-Next-Cursor` header.
+
+    Args:
+        test_id (Optional[int]): Only return results for this A/B test.
+        min_click_through_rate (Optional[float]): Lower bound on the click-through rate.
+        max_click_through_rate (Optional[float]): Upper bound on the click-through rate.
+        min_conversion_rate (Optional[float]): Lower bound on the conversion rate.
+        max_conversion_rate (Optional[float]): Upper bound on the conversion rate.
+        min_bounce_rate (Optional[float]): Lower bound on the bounce rate.
+        max_bounce_rate (Optional[float]): Upper bound on the bounce rate.
+        cursor (Optional[str]): Cursor returned with the previous page; omit for the first page.
+        limit (int): Maximum number of records to retrieve.
+        ids (Optional[str]): Comma-separated IDs to fetch in one query instead of a page.
+        format (Optional[str]): Response format, "json", "arrow" or "parquet".
+        accept (Optional[str]): Accept header used for content negotiation.
+        if_none_match (Optional[str]): ETag(s) the client already holds.
+        db (AsyncSession): Database session dependency to query the database.
+
+    Returns:
+        Response: The result records on this page and the cursor for the next page, as
+        JSON or in the requested columnar format.
+        An empty 304 response when `If-None-Match` matches the current ETag.
+    """
+    id_list = parse_ids(ids) if ids is not None else None
+    cache_key = (
+        test_id, min_click_through_rate, max_click_through_rate, min_conversion_rate,
+        max_conversion_rate, min_bounce_rate, max_bounce_rate, cursor, limit,
+        tuple(id_list) if id_list is not None else None,
+    )
+    query = select(ResultDB)
+    if test_id is not None:
+        query = query.filter(ResultDB.test_id == test_id)
+    bounds = [
+        (ResultDB.click_through_rate, min_click_through_rate, max_click_through_rate),
+        (ResultDB.conversion_rate, min_conversion_rate, max_conversion_rate),
+        (ResultDB.bounce_rate, min_bounce_rate, max_bounce_rate),
+    ]
+    for column, lower, upper in bounds:
+        if lower is not None:
+            query = query.filter(column >= lower)
+        if upper is not None:
+            query = query.filter(column <= upper)
+
+    if format is None and accept is not None and ARROW_MEDIA_TYPE in accept:
+        format = "arrow"
+    if format in COLUMNAR_MEDIA_TYPES:
+        query = query.with_only_columns(*ResultDB.__table__.columns)
+        page = await paginate_rows(db, query, ResultDB.results_id, cursor, limit, id_list)
+        body = encode_rows(page["items"], arrow_schema(query.selected_columns), format)
+        headers = {"ETag": compute_etag(body), "Vary": "Accept"}
+        if page["next_cursor"]:
+            headers["X-Next-Cursor"] = page["next_cursor"]
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=COLUMNAR_MEDIA_TYPES[format], headers=headers)
+
+    entry = response_cache.get("results", cache_key)
+    if entry is MISSING:
+        generation = response_cache.generation("results")
+        query = query.with_only_columns(*(getattr(ResultDB, field) for field in Result.model_fields))
+        page = await paginate_rows(db, query, ResultDB.results_id, cursor, limit, id_list)
+        entry = tag_json({"items": [row._asdict() for row in page["items"]], "next_cursor": page["next_cursor"]})
+        response_cache.set("results", cache_key, entry, generation)
+    # The format can follow the Accept header, so shared caches must key on it
+    return conditional_json(entry, if_none_match, {"Vary": "Accept"})
+
+# --- Event Endpoints ---
+@app.post("/events", status_code=202)
+async def ingest_events(events: List[EventCreate]) -> Dict[str, int]:
+    """
+    Accept raw events for write-behind storage in the events table.
+
+    Events are buffered in memory and written in batches in the background, so a 202 means
+    the events were accepted, not yet stored. Send events in batches, as one request per
+    event spends more on HTTP than on storage. Events without `occurred_at` are stamped with
+    the time they are accepted; naive timestamps are taken as UTC.
+
+    Args:
+        events (List[EventCreate]): The events to record.
+
+    Returns:
+        dict: The number of accepted events.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the buffer stays full, e.g. while the database is slow or down.
+    """
+    now = datetime.now(timezone.utc)
+    rows = []
+    for event in events:
+        row = event.model_dump()
+        if row["occurred_at"] is None:
+            row["occurred_at"] = now
+        elif row["occurred_at"].tzinfo is None:
+            row["occurred_at"] = row["occurred_at"].replace(tzinfo=timezone.utc)
+        rows.append(row)
+
+    if not await event_buffer.put(rows, EVENT_ENQUEUE_TIMEOUT):
+        raise HTTPException(status_code=503, detail="Event buffer is full, retry later", headers={"Retry-After": "1"})
+    return {"accepted": len(rows)}
+
+@app.get("/events/stats")
+async def get_event_stats() -> Dict[str, int]:
+    """
+    Report occupancy of the event buffer and how many events were flushed, dropped or rejected.
+
+    Returns:
+        dict: Buffered events, buffer capacity and flushed, dropped and rejected counts.
+    """
+    return event_buffer.stats()
+
+# --- Cache Endpoints ---
+@app.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Union[int, float]]:
+    """
+    Report hit/miss counters and occupancy of the in-process response cache.
+
+    Returns:
+        dict: Hits, misses, hit ratio, size, capacity, TTL, evictions and invalidations.
+    """
+    return response_cache.stats()
+
+# --- Pool Endpoints ---
+@app.get("/pool/stats")
+async def get_pool_stats() -> Dict[str, Union[int, float]]:
+    """
+    Report occupancy and checkout latency of the database connection pool.
+
+    A rising `checkout_wait_max_ms` or any `timeouts` with `checked_out` at
+    `pool_size + overflow` means requests are queueing for connections; raise
+    `DB_POOL_SIZE` or `DB_MAX_OVERFLOW`.
+
+    Returns:
+        dict: Pool size, checked in/out and overflow connections, checkouts, timeouts and wait times.
+    """
+    return pool_stats.report(engine.pool)
+
+# --- Metrics Endpoints ---
+@app.get("/metrics", response_class=Response)
+async def get_metrics() -> Response:
+    """
+    Expose request counts, per-route latency histograms, in-flight requests and database
+    queries per request in the Prometheus text format.
+
+    Returns:
+        Response: The metrics as `text/plain; version=0.0.4`.
+    """
+    return Response(content=metrics.render(), media_type=METRICS_MEDIA_TYPE)
+
+@app.get("/queries/stats")
+async def get_query_stats(limit: int = Query(20, ge=1, le=500)) -> List[Dict[str, Union[str, int, float]]]:
     """
-    Retrieve a list of all results in the database with pagination.
+    List the statement shapes that have taken the most total database time in this process.
 
     Args:
-        skip (int): Number of records to skip.
-        limit (int): Number of records to retrieve.
-        db (Session): Database session dependency to query the database.
+        limit (int): Number of shapes to return.
 
     Returns:
-        List[Result]: A list of result records.
+        list: Per shape, the normalised statement, call count, total/mean/max time in
+        milliseconds and rows affected or returned where the driver reports it.
     """
-    results = db.query(ResultDB).offset(skip).limit(limit).all()
-    return results
+    return query_stats.top(limit)
@@ -16,7 +16,7 @@ Features:
 
 """
 
-from sqlalchemy import Column, Integer, String, Float, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, BigInteger, DateTime, ForeignKey, Identity, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -30,7 +30,7 @@ class ABTestingDB(Base):
     This table represents the details of A/B tests conducted to evaluate different landing page variants and product offerings. It stores metadata about each test and associates it with the related landing pages and products.
 
     Attributes:
-        - test_id (Integer): Primary key for the A/B test.
+        - test_id (Integer): Primary key for the A/B test, generated by the database.
         - test_name (String): Name or identifier of the test.
         - start_date (String): Test start date in YYYY-MM-DD format.
         - end_date (String): Test end date in YYYY-MM-DD format.
@@ -40,20 +40,22 @@ class ABTestingDB(Base):
         - landing_page: Links to the LandingPageDB model.
         - product: Links to the ProductDB model.
         - results: Links to the ResultDB model for test outcomes.
+        - rollup: Links to the ResultRollupDB model holding the results' aggregates.
     """
     __tablename__ = "ab_testing"
 
-    test_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    test_id = Column(Integer, Identity(), primary_key=True, index=True)
     test_name = Column(String, nullable=False)
     start_date = Column(String, nullable=False)
     end_date = Column(String, nullable=False)
-    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     landing_page = relationship("LandingPageDB", back_populates="ab_tests")
     product = relationship("ProductDB", back_populates="ab_tests")
-    results = relationship("ResultDB", back_populates="ab_test", cascade="all, delete")
+    results = relationship("ResultDB", back_populates="ab_test", cascade="all, delete", passive_deletes=True)
+    rollup = relationship("ResultRollupDB", back_populates="ab_test", uselist=False, cascade="all, delete", passive_deletes=True)
 
 
 class CustomerDB(Base):
@@ -63,13 +65,13 @@ class CustomerDB(Base):
     This table stores information about the customers interacting with the platform. It includes unique identifiers, names, and contact details.
 
     Attributes:
-        - customer_id (BigInteger): Primary key for the customer.
+        - customer_id (BigInteger): Primary key for the customer, generated by the database.
         - name (String): Customer's full name.
         - email (String): Customer's email address (unique).
     """
     __tablename__ = "customers"
 
-    customer_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    customer_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
 
@@ -94,11 +96,11 @@ class LandingPageDB(Base):
     landing_page_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     variant_type = Column(String, nullable=False)
     page_url = Column(String, nullable=False)
-    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     product = relationship("ProductDB", back_populates="landing_pages")
-    ab_tests = relationship("ABTestingDB", back_populates="landing_page", cascade="all, delete")
+    ab_tests = relationship("ABTestingDB", back_populates="landing_page", cascade="all, delete", passive_deletes=True)
 
 
 class ProductDB(Base):
@@ -108,7 +110,7 @@ class ProductDB(Base):
     This table stores information about the products being promoted or sold. Each product can have multiple associated landing pages and A/B tests.
 
     Attributes:
-        - product_id (BigInteger): Primary key for the product.
+        - product_id (BigInteger): Primary key for the product, generated by the database.
         - product_name (String): Name of the product.
         - category (String): Category or type of product.
         - description (String): Brief description of the product (optional).
@@ -120,7 +122,7 @@ class ProductDB(Base):
     """
     __tablename__ = "products"
 
-    product_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    product_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
     product_name = Column(String, nullable=False)
     category = Column(String, nullable=False)
     description = Column(String, nullable=True)
@@ -128,8 +130,8 @@ class ProductDB(Base):
     release_date = Column(String, nullable=False)
 
     # Relationships
-    landing_pages = relationship("LandingPageDB", back_populates="product", cascade="all, delete")
-    ab_tests = relationship("ABTestingDB", back_populates="product", cascade="all, delete")
+    landing_pages = relationship("LandingPageDB", back_populates="product", cascade="all, delete", passive_deletes=True)
+    ab_tests = relationship("ABTestingDB", back_populates="product", cascade="all, delete", passive_deletes=True)
 
 
 class ResultDB(Base):
@@ -139,7 +141,7 @@ class ResultDB(Base):
     This table stores the performance metrics of A/B tests conducted on landing pages and products. The metrics include click-through rates, conversion rates, and bounce rates.
 
     Attributes:
-        - results_id (Integer): Primary key for the test result.
+        - results_id (Integer): Primary key for the test result, generated by the database.
         - click_through_rate (Float): Percentage of users who clicked on the landing page.
         - conversion_rate (Float): Percentage of users who completed the desired action.
         - bounce_rate (Float): Percentage of users who left the page without engaging.
@@ -148,12 +150,91 @@ class ResultDB(Base):
         - ab_test: Links to the ABTestingDB model for associated tests.
     """
     __tablename__ = "results"
+    __table_args__ = (
+        # Serves filtering by test and keyset pagination within a test
+        Index("ix_results_test_id_results_id", "test_id", "results_id"),
+    )
 
-    results_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    results_id = Column(Integer, Identity(), primary_key=True, index=True)
     click_through_rate = Column(Float, nullable=False)
     conversion_rate = Column(Float, nullable=False)
     bounce_rate = Column(Float, nullable=False)
-    test_id = Column(Integer, ForeignKey("ab_testing.test_id"), nullable=False)
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
 
     # Relationships
     ab_test = relationship("ABTestingDB", back_populates="results")
+
+
+class ResultRollupDB(Base):
+    """
+    Database model for per-test rollups of result metrics.
+
+    This table holds the sufficient statistics of each A/B test's results so that summaries and significance tests read one row instead of scanning the results table. It is maintained in the same transaction as every result write and can be rebuilt with `python -m Database.rollup`.
+
+    Attributes:
+        - test_id (Integer): Primary key and foreign key linking to the ab_testing table.
+        - count (BigInteger): Number of results recorded for the test.
+        - <metric>_sum (Float): Sum of the metric over the test's results.
+        - <metric>_sum_sq (Float): Sum of the squared metric over the test's results.
+        - <metric>_min (Float): Smallest value of the metric (null when there are no results).
+        - <metric>_max (Float): Largest value of the metric (null when there are no results).
+        where <metric> is click_through_rate, conversion_rate or bounce_rate.
+    Relationships:
+        - ab_test: Links to the ABTestingDB model for the summarized test.
+    """
+    __tablename__ = "result_rollups"
+
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    click_through_rate_sum = Column(Float, nullable=False, default=0.0)
+    click_through_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    click_through_rate_min = Column(Float, nullable=True)
+    click_through_rate_max = Column(Float, nullable=True)
+    conversion_rate_sum = Column(Float, nullable=False, default=0.0)
+    conversion_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    conversion_rate_min = Column(Float, nullable=True)
+    conversion_rate_max = Column(Float, nullable=True)
+    bounce_rate_sum = Column(Float, nullable=False, default=0.0)
+    bounce_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    bounce_rate_min = Column(Float, nullable=True)
+    bounce_rate_max = Column(Float, nullable=True)
+
+    # Relationships
+    ab_test = relationship("ABTestingDB", back_populates="rollup")
+
+
+class EventDB(Base):
+    """
+    Database model for raw user-level events.
+
+    This table records every exposure, click, conversion and bounce of a customer on the landing page of an A/B test, so that metrics can be computed per user instead of only from the pre-aggregated rates in the results table. Rows arrive through the buffered `POST /events` endpoint, which writes them in batches.
+
+    Attributes:
+        - event_id (BigInteger): Primary key for the event, generated by the database.
+        - event_type (String): One of "exposure", "click", "conversion" or "bounce".
+        - occurred_at (DateTime): When the event happened, with time zone.
+        - customer_id (BigInteger): Foreign key linking to the customers table.
+        - test_id (Integer): Foreign key linking to the ab_testing table.
+        - landing_page_id (Integer): Foreign key linking to the landing_pages table.
+    Relationships:
+        - customer: Links to the CustomerDB model for the customer who triggered the event.
+        - ab_test: Links to the ABTestingDB model for the test the event belongs to.
+        - landing_page: Links to the LandingPageDB model for the page variant that was shown.
+    """
+    __tablename__ = "events"
+    __table_args__ = (
+        # Serves reading a test's events in order
+        Index("ix_events_test_id_event_id", "test_id", "event_id"),
+    )
+
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    customer_id = Column(BigInteger().with_variant(Integer, "sqlite"), ForeignKey("customers.customer_id", ondelete="CASCADE"), nullable=False, index=True)
+    test_id = Column(Integer, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
+    landing_page_id = Column(Integer, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Relationships
+    customer = relationship("CustomerDB")
+    ab_test = relationship("ABTestingDB")
+    landing_page = relationship("LandingPageDB")
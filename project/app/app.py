@@ -19,8 +19,36 @@ if "product_data" not in st.session_state:
 if "show_program_buttons" not in st.session_state:
     st.session_state.show_program_buttons = False
 
+# Last ETag and payload per GET request, used for conditional requests across reruns.
+if "etag_cache" not in st.session_state:
+    st.session_state.etag_cache = {}
+
 # Utility Functions
 
+def conditional_get(url: str, params: dict = None):
+    """
+    Send a GET request with If-None-Match and reuse the stored payload on 304.
+
+    Args:
+        url (str): Endpoint URL.
+        params (dict): Query parameters.
+
+    Returns:
+        tuple: The status code (200 for a 304 served from the local copy) and the JSON payload.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    cached = st.session_state.etag_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = requests.get(url, params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        return 200, cached[1]
+    if response.status_code != 200:
+        return response.status_code, None
+    payload = response.json()
+    if "ETag" in response.headers:
+        st.session_state.etag_cache[key] = (response.headers["ETag"], payload)
+    return 200, payload
+
 def create_product(product_name, category, description, logo_url, release_date):
     """
     Create a new product by sending a POST request to the FastAPI endpoint.
@@ -59,16 +87,16 @@ def get_product_by_id(product_id: int) -> dict:
     Returns:
         dict: Product details if found, otherwise None.
     """
-    response = requests.get(f"{api_url}/products/{product_id}")
-    if response.status_code == 200:
-        return response.json()
+    status_code, product = conditional_get(f"{api_url}/products/{product_id}")
+    if status_code == 200:
+        return product
     else:
         st.error("Product not found.")
         return None
 
 def fetch_results(test_id: int):
     """
-    Fetch results for a specific test ID using a GET request.
+    Fetch results for a specific test ID, following the API's page cursors.
 
     Args:
         test_id (int): Test ID to fetch results for.
@@ -76,12 +104,17 @@ def fetch_results(test_id: int):
     Returns:
         list: List of results if successful, otherwise an empty list.
     """
-    response = requests.get(f"{api_url}/results/?test_id={test_id}")
-    if response.status_code == 200:
-        return response.json()
-    else:
-        st.error("Failed to fetch results.")
-        return []
+    results = []
+    params = {"test_id": test_id, "limit": 1000}
+    while True:
+        status_code, page = conditional_get(f"{api_url}/results/", params)
+        if status_code != 200:
+            st.error("Failed to fetch results.")
+            return []
+        results.extend(page["items"])
+        if page["next_cursor"] is None:
+            return results
+        params["cursor"] = page["next_cursor"]
 
 def redirect_to_page(page_name: str, product_id: int):
     """
@@ -146,12 +179,13 @@ def render_visualizations(page_name, test_id):
 # Function to generate and send random results to FastAPI
 def generate_and_create_results(test_id, num_results=50):
     """
-    Generate and send random results to the FastAPI backend.
+    Generate random results and send them to the FastAPI backend in a single bulk request.
 
     Args:
         test_id (int): Test ID to associate the results with.
         num_results (int): Number of results to generate. Default is 50.
     """
+    results = []
     for _ in range(num_results):
         if test_id == 1:  # Dummy1
             result_data = {
@@ -174,7 +208,11 @@ def generate_and_create_results(test_id, num_results=50):
                 "bounce_rate": round(random.uniform(0.3, 0.7), 2),         # Range 0.3 to 0.7
                 "test_id": test_id
             }
-        response = requests.post(f"{api_url}/results/", json=result_data)
+        results.append(result_data)
+
+    response = requests.post(f"{api_url}/results/bulk", json=results)
+    if response.status_code != 200:
+        st.error("Failed to create results.")
 
 # Populate data for a page when button is pressed
 def populate_data(page_name):
@@ -7,6 +7,8 @@ import sqlalchemy.ext.declarative as declarative
 import sqlalchemy.orm as orm
 from dotenv import load_dotenv
 import os
+import time
+from loguru import logger
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -14,8 +16,38 @@ load_dotenv(".env")
 # Get the database URL from environment variables
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# Pool settings, overridable through the environment (same variables as the API)
+POOL_OPTIONS = {
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+
 # Create the SQLAlchemy engine
-engine = sql.create_engine(DATABASE_URL)
+engine = sql.create_engine(DATABASE_URL, **POOL_OPTIONS)
+
+# Statements slower than this (milliseconds) are logged with their parameters redacted
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+
+@sql.event.listens_for(engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    """
+    Record when a statement is sent to the database.
+    """
+    context._query_started = time.perf_counter()
+
+@sql.event.listens_for(engine, "after_cursor_execute")
+def log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    """
+    Log statements slower than `SLOW_QUERY_MS` with their latency and row count.
+    """
+    elapsed_ms = 1000 * (time.perf_counter() - context._query_started)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        batches = len(parameters) if executemany else 1
+        logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {cursor.rowcount} rows, {batches} parameter sets, "
+                       f"parameters redacted): {' '.join(statement.split())}")
 
 # Base class for declarative models
 Base = declarative.declarative_base()
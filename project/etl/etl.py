@@ -6,6 +6,8 @@ This module is responsible for extracting data from CSV files and loading it int
 
 Functions:
     - load_csv_to_table(table_name, csv_path): Load a CSV file into a specified database table.
+    - sync_identity(table_name): Advance a table's identity sequence past the loaded IDs.
+    - build_result_rollups(): Recompute the per-test result rollups from the results table.
     - main(): Main execution process for batch loading multiple CSV files.
 
 Dependencies:
@@ -16,9 +18,10 @@ Dependencies:
 
 
 # Import necessary modules
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, delete, func, insert, select, text
 from sqlalchemy.orm import sessionmaker
-from database import engine, Base
+from database import engine
+from models import Base, Result, ResultRollup
 from loguru import logger
 import pandas as pd
 import glob
@@ -45,17 +48,80 @@ def load_csv_to_table(table_name: str, csv_path: str) -> None:
         INFO: Loaded data for table users from data/users.csv
     """
     # Read the CSV file into a DataFrame
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, skipinitialspace=True)
+    # Drop rows that would violate a unique constraint declared on the model
+    table = Base.metadata.tables.get(table_name)
+    if table is not None:
+        for column in table.columns:
+            if column.unique and column.name in df.columns:
+                duplicates = df.duplicated(subset=[column.name])
+                if duplicates.any():
+                    logger.warning(f"Dropping {duplicates.sum()} rows with duplicate {column.name} from {csv_path}")
+                    df = df[~duplicates]
     # Load DataFrame into the specified database table
     df.to_sql(table_name, con=engine, if_exists="append", index=False)
     logger.info(f"Loaded data for table {table_name} from {csv_path}")
 
+def sync_identity(table_name: str) -> None:
+    """
+    Advance the identity sequence of a table's primary key past the highest loaded ID.
+
+    The CSV files carry explicit IDs, which do not move the database-generated identity
+    forward. Without this step the first API insert would collide with a loaded row.
+
+    Args:
+        table_name (str): The name of the database table to synchronise.
+
+    Returns:
+        None
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return
+    pk = table.primary_key.columns.values()[0].name
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table_name}', '{pk}'), "
+            f"COALESCE(MAX({pk}), 1), MAX({pk}) IS NOT NULL) FROM {table_name}"
+        ))
+
+def build_result_rollups() -> None:
+    """
+    Recompute the per-test result rollups (count, sum, sum of squares, min and max of each
+    rate column) from the loaded results. The API keeps them up to date afterwards.
+
+    Returns:
+        None
+    """
+    aggregates = [Result.test_id, func.count(Result.results_id)]
+    columns = ["test_id", "count"]
+    for metric in ("click_through_rate", "conversion_rate", "bounce_rate"):
+        value = getattr(Result, metric)
+        aggregates += [func.sum(value), func.sum(value * value), func.min(value), func.max(value)]
+        columns += [f"{metric}_sum", f"{metric}_sum_sq", f"{metric}_min", f"{metric}_max"]
+    with engine.begin() as conn:
+        conn.execute(delete(ResultRollup))
+        conn.execute(insert(ResultRollup).from_select(columns, select(*aggregates).group_by(Result.test_id)))
+
+# Create the tables (with their identity columns) before loading any data
+Base.metadata.create_all(bind=engine)
+
 # Specify the path to the folder containing CSV files
 folder_path = "data/*.csv"
 
 # Use glob to get a list of CSV file paths in the specified folder
 files = glob.glob(folder_path)
 
+# Load parent tables before the tables that reference them
+load_order = [table.name for table in Base.metadata.sorted_tables]
+table_names = [path.splitext(path.basename(file_path))[0] for file_path in files]
+files = [file_path for _, file_path in sorted(
+    zip(table_names, files),
+    key=lambda pair: load_order.index(pair[0]) if pair[0] in load_order else len(load_order)
+)]
+
 # Extract table names from CSV file names and load each file into its respective table
 for file_path in files:
     """
@@ -66,8 +132,14 @@ for file_path in files:
     try:
         # Load the CSV data into the table
         load_csv_to_table(table_name, file_path)
+        sync_identity(table_name)
     except Exception as e:
         logger.error(f"Failed to ingest table {table_name}. Error: {e}")
 
+try:
+    build_result_rollups()
+except Exception as e:
+    logger.error(f"Failed to build result rollups. Error: {e}")
+
 logger.info("All tables have been populated.")
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, String, BigInteger, Float, ForeignKey, Sequence
+from sqlalchemy import Column, Integer, String, Text, BigInteger, DateTime, Float, ForeignKey, Identity, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -7,12 +7,12 @@ Base = declarative_base()
 class ABTesting(Base):
     __tablename__ = "ab_testing"
 
-    test_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    test_id = Column(BigInteger, Identity(), primary_key=True, index=True)
     test_name = Column(String, nullable=False)
     start_date = Column(String, nullable=False)
     end_date = Column(String, nullable=False)
-    landing_page_id = Column(BigInteger, ForeignKey("landing_pages.landing_page_id"), nullable=False)
-    product_id = Column(BigInteger, ForeignKey("products.product_id"), nullable=False)
+    landing_page_id = Column(BigInteger, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(BigInteger, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     landing_page = relationship("LandingPage", back_populates="ab_tests")
     product = relationship("Product", back_populates="ab_tests")
@@ -20,7 +20,7 @@ class ABTesting(Base):
 
 class CustomerDB(Base):
     __tablename__ = "customers"
-    customer_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    customer_id = Column(BigInteger, Identity(), primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
 
@@ -32,7 +32,7 @@ class LandingPage(Base):
     landing_page_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
     variant_type = Column(String, nullable=False)
     page_url = Column(String, nullable=False)
-    product_id = Column(BigInteger, ForeignKey("products.product_id"), nullable=False)
+    product_id = Column(BigInteger, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True)
 
     product = relationship("Product", back_populates="landing_pages")
     ab_tests = relationship("ABTesting", back_populates="landing_page")
@@ -41,7 +41,7 @@ class LandingPage(Base):
 class Product(Base):
     __tablename__ = "products"
 
-    product_id = Column(BigInteger, primary_key=True, index=True, nullable=False)
+    product_id = Column(BigInteger, Identity(), primary_key=True, index=True)
     product_name = Column(String, nullable=False)
     category = Column(String, nullable=False)
     description = Column(String, nullable=True)
@@ -54,12 +54,15 @@ class Product(Base):
 
 class Result(Base):
     __tablename__ = "results"
+    __table_args__ = (
+        Index("ix_results_test_id_results_id", "test_id", "results_id"),
+    )
 
-    results_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    results_id = Column(BigInteger, Identity(), primary_key=True, index=True)
     click_through_rate = Column(Float, nullable=False)
     conversion_rate = Column(Float, nullable=False)
     bounce_rate = Column(Float, nullable=False)
-    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id"), nullable=False)
+    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
 
     ab_test = relationship("ABTesting")
 
@@ -67,11 +70,48 @@ class Result(Base):
 class MissingResults(Base):
     __tablename__ = "missing_results"
 
-    missing_results_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    missing_results_id = Column(BigInteger, Identity(), primary_key=True, index=True)
     reason_missing = Column(Text, nullable=False)
     date_logged = Column(String, nullable=False)
-    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id"), nullable=False)
-    results_id = Column(BigInteger, ForeignKey("results.results_id"), nullable=False)
+    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False, index=True)
+    results_id = Column(BigInteger, ForeignKey("results.results_id", ondelete="CASCADE"), nullable=False, index=True)
 
     ab_test = relationship("ABTesting")
-    result = relationship("Result")
\ No newline at end of file
+    result = relationship("Result")
+
+class ResultRollup(Base):
+    __tablename__ = "result_rollups"
+
+    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    click_through_rate_sum = Column(Float, nullable=False, default=0.0)
+    click_through_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    click_through_rate_min = Column(Float, nullable=True)
+    click_through_rate_max = Column(Float, nullable=True)
+    conversion_rate_sum = Column(Float, nullable=False, default=0.0)
+    conversion_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    conversion_rate_min = Column(Float, nullable=True)
+    conversion_rate_max = Column(Float, nullable=True)
+    bounce_rate_sum = Column(Float, nullable=False, default=0.0)
+    bounce_rate_sum_sq = Column(Float, nullable=False, default=0.0)
+    bounce_rate_min = Column(Float, nullable=True)
+    bounce_rate_max = Column(Float, nullable=True)
+
+    ab_test = relationship("ABTesting")
+
+class Event(Base):
+    __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_test_id_event_id", "test_id", "event_id"),
+    )
+
+    event_id = Column(BigInteger, Identity(), primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    customer_id = Column(BigInteger, ForeignKey("customers.customer_id", ondelete="CASCADE"), nullable=False, index=True)
+    test_id = Column(BigInteger, ForeignKey("ab_testing.test_id", ondelete="CASCADE"), nullable=False)
+    landing_page_id = Column(BigInteger, ForeignKey("landing_pages.landing_page_id", ondelete="CASCADE"), nullable=False, index=True)
+
+    customer = relationship("CustomerDB")
+    ab_test = relationship("ABTesting")
+    landing_page = relationship("LandingPage")
@@ -0,0 +1,224 @@
+"""
+Helpers shared by the API load and benchmark scripts in this directory.
+
+Each script resets the database schema, seeds it, starts the API with uvicorn and drives it
+over HTTP with plain `http.client` connections, so it needs nothing beyond the API's own
+requirements. `--api-dir` points the scripts at another checkout of `project/api` (for
+example a `git worktree` of an earlier commit) to compare before and after a change.
+
+The schema is dropped and recreated: point `--database-url` at a scratch database.
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import sqlalchemy as sa
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "project", "api")
+
+# Tables whose identity sequences are advanced past explicitly inserted IDs
+SEQUENCES = (
+    ("products", "product_id"), ("landing_pages", "landing_page_id"), ("ab_testing", "test_id"),
+    ("customers", "customer_id"), ("results", "results_id"),
+)
+
+
+def add_common_arguments(parser: argparse.ArgumentParser, workers: int = 1) -> None:
+    """
+    Add the database, API checkout and server options every script takes.
+    """
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"),
+                        help="Scratch database, e.g. postgresql://postgres@localhost:5432/abtest (default: $DATABASE_URL)")
+    parser.add_argument("--api-dir", default=API_DIR, help="The project/api checkout to serve (default: this one)")
+    parser.add_argument("--port", type=int, default=8100, help="Port to serve the API on (default: 8100)")
+    parser.add_argument("--workers", type=int, default=workers, help=f"uvicorn worker processes (default: {workers})")
+
+
+def reset_schema(database_url: str, api_dir: str) -> None:
+    """
+    Drop everything in the database and create the tables of the given API checkout.
+
+    The tables are created by a subprocess importing that checkout's models, so older
+    checkouts get their own schema.
+    """
+    engine = sa.create_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        engine.dispose()
+        path = engine.url.database
+        if path and os.path.exists(path):
+            os.remove(path)
+    else:
+        with engine.begin() as connection:
+            connection.execute(sa.text("DROP SCHEMA public CASCADE"))
+            connection.execute(sa.text("CREATE SCHEMA public"))
+        engine.dispose()
+    subprocess.run(
+        [sys.executable, "-c", (
+            "import os, sqlalchemy as sa\n"
+            "from Database import models\n"
+            "models.Base.metadata.create_all(sa.create_engine(os.environ['DATABASE_URL']))\n"
+        )],
+        cwd=api_dir, env=dict(os.environ, DATABASE_URL=database_url), check=True,
+    )
+
+
+def seed(database_url: str, products: int = 1, landing_pages: int = 1, tests: int = 1,
+         customers: int = 1000, results: int = 0) -> None:
+    """
+    Insert generated rows with IDs 1..n into each table, then advance identity sequences.
+
+    Landing page i and test i belong to product (i - 1) % products + 1, test i shows landing
+    page (i - 1) % landing_pages + 1, and result i belongs to test (i - 1) % tests + 1. The
+    first `products` landing pages are variant A, the next B, and so on.
+    """
+    statements = [
+        ("products", products, "INSERT INTO products (product_id, product_name, category, release_date) "
+                               "SELECT n, 'product ' || n, 'category', '2024-01-01' FROM seq"),
+        ("landing_pages", landing_pages,
+         "INSERT INTO landing_pages (landing_page_id, variant_type, page_url, product_id) "
+         f"SELECT n, CASE WHEN (n - 1) / {products} % 2 = 0 THEN 'A' ELSE 'B' END, 'https://example.com/' || n, "
+         f"(n - 1) % {products} + 1 FROM seq"),
+        ("ab_testing", tests,
+         "INSERT INTO ab_testing (test_id, test_name, start_date, end_date, landing_page_id, product_id) "
+         f"SELECT n, 'test ' || n, '2024-01-01', '2024-12-31', (n - 1) % {landing_pages} + 1, "
+         f"(n - 1) % {products} + 1 FROM seq"),
+        ("customers", customers, "INSERT INTO customers (customer_id, name, email) "
+                                 "SELECT n, 'customer ' || n, 'customer' || n || '@example.com' FROM seq"),
+        ("results", results,
+         "INSERT INTO results (results_id, click_through_rate, conversion_rate, bounce_rate, test_id) "
+         f"SELECT n, (n % 1000) / 1000.0, (n % 100) / 1000.0, (n % 700) / 1000.0, (n - 1) % {tests} + 1 FROM seq"),
+    ]
+    engine = sa.create_engine(database_url)
+    with engine.begin() as connection:
+        for _, count, statement in statements:
+            if count:
+                connection.execute(sa.text(
+                    "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count) "
+                    + statement
+                ), {"count": count})
+        if engine.dialect.name == "postgresql":
+            for table, column in SEQUENCES:
+                sequence = connection.execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', '{column}')")).scalar()
+                if sequence:
+                    connection.execute(sa.text(
+                        f"SELECT setval('{sequence}', (SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}), false)"
+                    ))
+    engine.dispose()
+
+
+@contextmanager
+def serve(api_dir: str, database_url: str, port: int, workers: int = 1,
+          env: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, int]]:
+    """
+    Run the API under uvicorn until the block exits.
+
+    Args:
+        api_dir (str): The project/api checkout to serve.
+        database_url (str): Database the API connects to.
+        port (int): Port to listen on.
+        workers (int): uvicorn worker processes.
+        env (Optional[dict]): Extra environment variables for the server, e.g. cache settings.
+
+    Yields:
+        tuple: The (host, port) the API listens on, once it answers requests.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=api_dir, env=dict(os.environ, DATABASE_URL=database_url, **(env or {})),
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"The API exited with status {server.returncode}")
+            try:
+                if Client("127.0.0.1", port).request("GET", "/docs")[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("The API did not start within 60 seconds")
+            time.sleep(0.2)
+        yield "127.0.0.1", port
+    finally:
+        server.terminate()
+        server.wait()
+
+
+class Client:
+    """
+    Keep-alive HTTP client over one connection, reconnecting after errors.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 60) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send one request and return its status, headers and body.
+        """
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = dict(headers or {})
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, {key.lower(): value for key, value in response.getheaders()}, response.read()
+        except Exception:
+            self.connection.close()
+            self.connection = None
+            raise
+
+
+def run_concurrently(address: Tuple[str, int], concurrency: int, requests: int,
+                     send: Callable[[Client, int], Any], timeout: float = 60) -> Tuple[List[Any], List[float], float]:
+    """
+    Issue `requests` calls of `send(client, index)` from `concurrency` threads.
+
+    Each thread keeps its own keep-alive connection, whose requests time out after
+    `timeout` seconds.
+
+    Returns:
+        tuple: The value of each call (or the exception it raised), each call's latency in
+        seconds, and the wall-clock time of the whole run.
+    """
+    local = threading.local()
+
+    def call(index: int) -> Tuple[Any, float]:
+        if not hasattr(local, "client"):
+            local.client = Client(*address, timeout=timeout)
+        started = time.perf_counter()
+        try:
+            outcome = send(local.client, index)
+        except Exception as exc:
+            outcome = exc
+        return outcome, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        calls = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    return [outcome for outcome, _ in calls], [latency for _, latency in calls], elapsed
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Return the value below which `fraction` of the sorted values fall.
+    """
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
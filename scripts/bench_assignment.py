@@ -0,0 +1,91 @@
+"""
+Latency of GET /abtests/{test_id}/assign, and a check that assignments never query the database.
+
+Resets the schema, seeds products with an A and a B landing page each and one A/B test per
+product, starts the API and sends `--requests` sequential assignments over one keep-alive
+connection, cycling through tests and customers. It reports round-trip p50/p99/p99.9 as seen
+by the client, how the customers split over the variants, and the number of database
+statements the API ran meanwhile, read from `db_queries_total` on /metrics.
+
+The run fails if p99 exceeds `--max-p99-ms`, if any response is not a 200, or if any
+database statement ran during the assignments.
+
+Usage, from the repository root, against a scratch database:
+
+    python scripts/bench_assignment.py --database-url postgresql://postgres@localhost:5432/abtest
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+from api_harness import Client, add_common_arguments, percentile, reset_schema, seed, serve
+
+
+def queries_total(client: Client) -> int:
+    """
+    Return the `db_queries_total` counter from the API's /metrics.
+    """
+    status, _, body = client.request("GET", "/metrics")
+    if status != 200:
+        raise RuntimeError(f"GET /metrics returned {status}")
+    for line in body.decode().splitlines():
+        if line.startswith("db_queries_total "):
+            return int(float(line.split()[1]))
+    raise RuntimeError("/metrics has no db_queries_total line")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_common_arguments(parser)
+    parser.add_argument("--requests", type=int, default=20000, help="Assignments to time (default: 20000)")
+    parser.add_argument("--tests", type=int, default=100, help="A/B tests to seed, one per product (default: 100)")
+    parser.add_argument("--max-p99-ms", type=float, default=1.0, help="Largest acceptable p99 in ms (default: 1.0)")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    reset_schema(args.database_url, args.api_dir)
+    # Product i has landing pages i (variant A) and tests + i (variant B), and test i runs on it
+    seed(args.database_url, products=args.tests, landing_pages=2 * args.tests, tests=args.tests, customers=0)
+
+    with serve(args.api_dir, args.database_url, args.port, args.workers) as address:
+        client = Client(*address)
+        paths = [f"/abtests/{index % args.tests + 1}/assign?customer_id={index}" for index in range(args.requests)]
+        # Warm up the connection and the route
+        for path in paths[:1000]:
+            client.request("GET", path)
+        queries_before = queries_total(client)
+        latencies = []
+        bodies = []
+        failures = 0
+        for path in paths:
+            started = time.perf_counter()
+            status, _, body = client.request("GET", path)
+            latencies.append(time.perf_counter() - started)
+            bodies.append(body)
+            failures += status != 200
+        queries = queries_total(client) - queries_before
+
+    variants = Counter(json.loads(body).get("variant_type") for body in bodies)
+    p99 = percentile(latencies, 0.99) * 1000
+    print(f"{args.requests} sequential assignments over {args.tests} tests on {args.workers} worker(s)")
+    print(f"  p50 {percentile(latencies, 0.5) * 1000:.3f} ms, p99 {p99:.3f} ms, "
+          f"p99.9 {percentile(latencies, 0.999) * 1000:.3f} ms, max {max(latencies) * 1000:.3f} ms")
+    print(f"  variants: {dict(variants)}, non-200 responses: {failures}, database statements: {queries}")
+
+    checks = [
+        (p99 > args.max_p99_ms, f"p99 {p99:.3f} ms is above {args.max_p99_ms} ms"),
+        (failures > 0, f"{failures} assignments did not return 200"),
+        (queries > 0, f"assignments ran {queries} database statements"),
+    ]
+    for failed, message in checks:
+        if failed:
+            print(f"FAIL: {message}")
+    return 1 if any(failed for failed, _ in checks) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Rows/sec of the /results/ and /customers/ list endpoints when paging through whole tables.
+
+For each size in `--sizes`, resets the schema, seeds that many results and customers, starts
+the API and follows `next_cursor` through each table in pages of `--limit` rows, over one
+keep-alive connection. Each size reports the best of `--repeat` passes. The response cache
+is disabled so every page is queried and serialized.
+
+Usage, from the repository root, against a scratch database:
+
+    python scripts/bench_list_pages.py --database-url postgresql://postgres@localhost:5432/abtest
+
+Run it again with `--api-dir` pointing at a checkout from before the column-tuple/orjson
+serialization to compare.
+"""
+
+import argparse
+import json
+import sys
+import time
+from urllib.parse import quote
+
+from api_harness import Client, add_common_arguments, reset_schema, seed, serve
+
+ENDPOINTS = ("/results/", "/customers/")
+
+
+def page_through(client: Client, endpoint: str, limit: int) -> int:
+    """
+    Follow `next_cursor` from the first page to the last and return the rows received.
+    """
+    rows = 0
+    cursor = None
+    while True:
+        path = f"{endpoint}?limit={limit}" + (f"&cursor={quote(cursor)}" if cursor else "")
+        status, _, body = client.request("GET", path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        page = json.loads(body)
+        rows += len(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_common_arguments(parser)
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated table sizes (default: 10000,100000)")
+    parser.add_argument("--limit", type=int, default=1000, help="Rows per page (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per size; the fastest is reported (default: 3)")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    env = {"CACHE_MAX_ENTRIES": "0", "CACHE_MAX_PAGES": "0"}
+
+    print(f"Pages of {args.limit} rows, best of {args.repeat} passes, response cache disabled")
+    for size in sizes:
+        reset_schema(args.database_url, args.api_dir)
+        seed(args.database_url, tests=10, customers=size, results=size)
+        with serve(args.api_dir, args.database_url, args.port, args.workers, env) as address:
+            client = Client(*address)
+            for endpoint in ENDPOINTS:
+                best = None
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    rows = page_through(client, endpoint, args.limit)
+                    elapsed = time.perf_counter() - started
+                    if rows != size:
+                        raise RuntimeError(f"{endpoint} returned {rows} rows, expected {size}")
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f"  {endpoint:<12} {size:>8} rows  {best:7.3f} s  {size / best:10.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Concurrent-request throughput of the API at several concurrency levels.
+
+Resets the schema, seeds customers, products and A/B tests, starts the API and, for each
+level in `--concurrency`, sends `--requests` GETs of `--path` from that many threads. Each
+level reports requests/s, latency percentiles and the status codes seen. `{id}` in the path
+is replaced by an ID cycling through the seeded rows.
+
+The response cache is disabled unless `--cache` is given, so every request reaches the
+database (checkouts without a cache ignore the setting).
+
+Usage, from the repository root, against a scratch Postgres database:
+
+    python scripts/load_test.py --database-url postgresql://postgres@localhost:5432/abtest \\
+        --concurrency 1,4,8,16,32
+
+Run it again with `--api-dir` pointing at a checkout from before the async port to compare.
+A level where a request takes longer than `--timeout` seconds is reported as stalled; its
+remaining requests and the higher levels are skipped.
+"""
+
+import argparse
+import sys
+import threading
+from collections import Counter
+
+from api_harness import Client, add_common_arguments, percentile, reset_schema, run_concurrently, seed, serve
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_common_arguments(parser)
+    parser.add_argument("--concurrency", default="1,4,8,16,32", help="Comma-separated concurrency levels (default: 1,4,8,16,32)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per level (default: 2000)")
+    parser.add_argument("--path", default="/customers/{id}", help="Path to request (default: /customers/{id})")
+    parser.add_argument("--rows", type=int, default=1000, help="Customers, products and tests to seed (default: 1000)")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds a request may take before the level counts as stalled (default: 30)")
+    parser.add_argument("--cache", action="store_true", help="Keep the API's response cache enabled")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    reset_schema(args.database_url, args.api_dir)
+    seed(args.database_url, products=args.rows, landing_pages=args.rows, tests=args.rows, customers=args.rows)
+    env = {} if args.cache else {"CACHE_MAX_ENTRIES": "0", "CACHE_MAX_PAGES": "0"}
+
+    def get(client, index):
+        return client.request("GET", args.path.format(id=index % args.rows + 1))[0]
+
+    print(f"GET {args.path} on {args.workers} worker(s), {args.requests} requests per level")
+    with serve(args.api_dir, args.database_url, args.port, args.workers, env) as address:
+        # Warm up the API's connection pool
+        warmup = Client(*address)
+        for index in range(50):
+            get(warmup, index)
+        for concurrency in levels:
+            stalled = threading.Event()
+
+            def send(client, index):
+                if stalled.is_set():
+                    return "skipped"
+                try:
+                    return get(client, index)
+                except TimeoutError:
+                    stalled.set()
+                    raise
+
+            outcomes, latencies, elapsed = run_concurrently(address, concurrency, args.requests, send, args.timeout)
+            statuses = Counter(
+                type(outcome).__name__ if isinstance(outcome, Exception) else outcome for outcome in outcomes
+            )
+            if stalled.is_set():
+                print(f"  c={concurrency:<4} stalled: a request got no response within {args.timeout:.0f} s, "
+                      f"statuses {dict(statuses)}; skipping higher levels")
+                return 1
+            print(f"  c={concurrency:<4} {args.requests / elapsed:8.0f} requests/s  "
+                  f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  p99 {percentile(latencies, 0.99) * 1000:8.1f} ms  "
+                  f"statuses {dict(statuses)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())